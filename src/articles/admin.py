@@ -1,5 +1,7 @@
 from django.contrib import admin
 
+from core.admin import SoftDeleteAdminMixin
+
 from .models import Article, Comment, Resource
 
 
@@ -9,13 +11,21 @@ class CommentArticleInline(admin.TabularInline):
 
 class ResourceArticleInline(admin.TabularInline):
     model = Resource
-    exclude = ('comment', 'is_deleted')
+    exclude = ('comment', 'is_deleted', 'deleted_at')
 
 
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
     inlines = (ResourceArticleInline, CommentArticleInline,)
+    list_display = ('title', 'author', 'created_at', 'is_deleted')
     readonly_fields = ('slug',)
-    exclude = ('is_deleted',)
+    exclude = ('is_deleted', 'deleted_at')
+
+
+class CommentAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    list_display = ('__str__', 'article', 'author', 'created_at', 'is_deleted')
+    list_select_related = ('article', 'author')
+    exclude = ('is_deleted', 'deleted_at')
 
 
 admin.site.register(Article, ArticleAdmin)
+admin.site.register(Comment, CommentAdmin)
@@ -3,3 +3,11 @@ from django.apps import AppConfig
 
 class ArticlesConfig(AppConfig):
     name = 'articles'
+
+    def ready(self):
+        # Connect signal receivers
+        from . import receivers
+
+        # Fail at startup if the search backend doesn't fit the database
+        from .search import get_search_backend
+        get_search_backend()
@@ -0,0 +1,85 @@
+from core.benchmark import create_benchmark_user
+
+from .models import Article, Comment, Resource
+
+
+def create_fixtures(articles: int, comments: int = 0, resources: int = 0, author=None):
+    """
+    Creates articles with comments and resources by bulk queries.
+    :param articles: number of articles
+    :param comments: number of comments of every article
+    :param resources: number of resources of every article and comment
+    :param author: author of articles and comments, new benchmark user by default,
+        whose unique username prefixes slugs
+    :return: list of article ids
+    """
+    if author is None:
+        author = create_benchmark_user()
+    prefix = author.username
+
+    Article.objects.bulk_create([
+        Article(
+            title='Benchmark article %d' % i,
+            description='Description of benchmark article %d' % i,
+            text='Text of benchmark article %d. ' % i * 50,
+            preview_image='https://benchmark.com/%d.png' % i,
+            slug='%s-%d' % (prefix, i),
+            author=author,
+            comment_count=comments,
+            resource_count=resources,
+        ) for i in range(articles)
+    ])
+    article_ids = list(
+        Article.objects.filter(author=author, slug__startswith=prefix + '-')
+        .values_list('pk', flat=True)
+    )
+
+    Comment.objects.bulk_create([
+        Comment(article_id=article_id, author=author, text='Comment %d' % i)
+        for article_id in article_ids for i in range(comments)
+    ])
+    comment_ids = list(
+        Comment.objects.filter(article_id__in=article_ids).values_list('pk', flat=True)
+    )
+
+    Resource.objects.bulk_create(
+        [
+            Resource(article_id=article_id, url='https://benchmark.com/%d' % i, type='IMG')
+            for article_id in article_ids for i in range(resources)
+        ] + [
+            Resource(comment_id=comment_id, url='https://benchmark.com/%d' % i, type='URL')
+            for comment_id in comment_ids for i in range(resources)
+        ]
+    )
+
+    return article_ids
+
+
+def make_import_rows(articles: int, comments: int = 0, resources: int = 0, author_id: int = None):
+    """
+    Returns rows in the format of `ArticleImport`.
+    :param articles: number of articles
+    :param comments: number of comments of every article
+    :param resources: number of resources of every article and comment
+    :param author_id: author of articles and comments
+    :return: list of dicts
+    """
+    def make_resources():
+        return [
+            {'url': 'https://benchmark.com/%d' % i, 'type': 'IMG'} for i in range(resources)
+        ]
+
+    return [
+        {
+            'title': 'Benchmark article %d' % i,
+            'description': 'Description of benchmark article %d' % i,
+            'text': 'Text of benchmark article %d. ' % i * 50,
+            'preview_image': 'https://benchmark.com/%d.png' % i,
+            'author_id': author_id,
+            'resources': make_resources(),
+            'comments': [
+                {'author_id': author_id, 'text': 'Comment %d' % j, 'resources': make_resources()}
+                for j in range(comments)
+            ],
+        } for i in range(articles)
+    ]
@@ -0,0 +1,92 @@
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from core.utils import cache_aget
+
+
+class ArticleResponseCache:
+    """
+    Cache of rendered article detail responses.
+
+    Backend is any Django cache (LocMem, file based, Redis, ...)
+    configured by `ARTICLE_CACHE_ALIAS` setting. It must be shared by
+    all workers, invalidation doesn't reach private caches of other processes.
+    Entries are keyed by article id taken from the slug prefix,
+    so renaming an article doesn't leave entries of its old slug.
+    """
+    key_prefix = 'article-detail'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.ARTICLE_CACHE_ALIAS]
+
+    def make_key(self, article_id) -> str:
+        return '%s:%s' % (self.key_prefix, article_id)
+
+    @staticmethod
+    def get_article_id(slug: str) -> Optional[str]:
+        article_id = slug.split('-', 1)[0]
+        return article_id if article_id.isdigit() else None
+
+    def get(self, slug: str) -> Optional[bytes]:
+        """
+        Returns rendered response content of the article or None.
+        :param slug: article slug
+        :return: content
+        """
+        article_id = self.get_article_id(slug)
+        entry = None
+        if article_id is not None:
+            entry = self.cache.get(self.make_key(article_id))
+
+        return self._get_content(slug, entry)
+
+    async def aget(self, slug: str) -> Optional[bytes]:
+        article_id = self.get_article_id(slug)
+        entry = None
+        if article_id is not None:
+            entry = await cache_aget(self.cache, self.make_key(article_id))
+
+        return self._get_content(slug, entry)
+
+    def _get_content(self, slug, entry):
+        # Entry of renamed article is a miss too
+        content = entry[1] if entry is not None and entry[0] == slug else None
+
+        with self._lock:
+            if content is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return content
+
+    def set(self, slug: str, content: bytes):
+        article_id = self.get_article_id(slug)
+        if article_id is not None:
+            self.cache.set(
+                self.make_key(article_id),
+                (slug, content),
+                settings.ARTICLE_CACHE_TIMEOUT
+            )
+
+    def invalidate(self, article_ids):
+        self.cache.delete_many([self.make_key(pk) for pk in article_ids])
+
+    def stats(self) -> dict:
+        """
+        Returns hits and misses counters of the current process.
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+article_cache = ArticleResponseCache()
@@ -0,0 +1,64 @@
+from collections import defaultdict
+from typing import Iterable, Mapping, Optional
+
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .models import Article, Comment, Resource
+
+COUNTED = {
+    'comment_count': Comment,
+    'resource_count': Resource,
+}
+
+
+def change_counters(field: str, deltas: Mapping[int, int]):
+    """
+    Adds deltas to counters of articles by `F()` updates,
+    one per distinct delta. `activity_at` is changed too,
+    so conditional requests of the main page see new counters.
+    :param field: `comment_count` or `resource_count`
+    :param deltas: `{article_id: delta}`
+    """
+    article_ids = defaultdict(list)
+    for article_id, delta in deltas.items():
+        if delta and article_id is not None:
+            article_ids[delta].append(article_id)
+
+    for delta, ids in article_ids.items():
+        Article.include_deleted.filter(pk__in=ids).update(**{
+            # Drifted counter must not become negative
+            field: Greatest(F(field) + delta, Value(0)),
+            'activity_at': timezone.now(),
+        })
+
+
+def live_count(model):
+    return Coalesce(Subquery(
+        model.objects.filter(article=OuterRef('pk'))
+        .order_by().values('article').annotate(count=Count('pk')).values('count')
+    ), Value(0))
+
+
+def reconcile_counters(article_ids: Optional[Iterable[int]] = None) -> list:
+    """
+    Recounts counters of articles which differ from actual numbers.
+    :param article_ids: articles to check, all by default
+    :return: ids of fixed articles
+    """
+    queryset = Article.include_deleted.all()
+    if article_ids is not None:
+        queryset = queryset.filter(pk__in=list(article_ids))
+
+    queryset = queryset.annotate(
+        **{'actual_' + field: live_count(model) for field, model in COUNTED.items()}
+    ).exclude(**{field: F('actual_' + field) for field in COUNTED})
+
+    drifted = list(queryset.values_list('pk', flat=True))
+    if drifted:
+        Article.include_deleted.filter(pk__in=drifted).update(
+            activity_at=timezone.now(),
+            **{field: live_count(model) for field, model in COUNTED.items()}
+        )
+    return drifted
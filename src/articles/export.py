@@ -0,0 +1,162 @@
+import csv
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterator, List
+
+from django.db.models import Q
+from rest_framework import serializers
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import Article, Comment, Resource
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """
+    Parameters of the export, ranges are `after <= value < before`.
+    """
+    output = serializers.ChoiceField(choices=('jsonl', 'csv'), default='jsonl')
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+
+
+class Echo:
+    """
+    File-like object returning written value, so `csv.writer` can stream rows.
+    """
+    def write(self, value):
+        return value
+
+
+class ArticleExport:
+    """
+    Streams live articles with their comments and resources.
+
+    Articles are read by `.iterator()` in chunks ordered by id, comments and
+    resources of every chunk are fetched by two queries, so memory usage
+    depends on `chunk_size` only.
+    """
+    article_fields = (
+        'id', 'slug', 'title', 'description', 'text', 'preview_image',
+        'author_id', 'created_at', 'updated_at',
+    )
+    comment_fields = ('id', 'article_id', 'author_id', 'text', 'created_at', 'updated_at')
+    resource_fields = ('id', 'article_id', 'comment_id', 'url', 'type')
+
+    # Flat rows of all records, `record` column holds the record type
+    csv_columns = (
+        'record', 'id', 'article_id', 'comment_id', 'author_id', 'slug', 'title',
+        'description', 'text', 'preview_image', 'url', 'type', 'created_at', 'updated_at',
+    )
+
+    encoder = JSONEncoder()
+
+    content_types = {
+        'jsonl': 'application/x-ndjson',
+        'csv': 'text/csv',
+    }
+
+    def __init__(self, output='jsonl', chunk_size=1000, **filters):
+        """
+        :param output: `jsonl` or `csv`
+        :param chunk_size: number of articles fetched at once
+        :param filters: `created_after`, `created_before`, `updated_after`, `updated_before`
+        """
+        self.output = output
+        self.chunk_size = chunk_size
+        self.filters = filters
+
+    @property
+    def content_type(self):
+        return self.content_types[self.output]
+
+    def get_queryset(self):
+        lookups = {}
+        for name, value in self.filters.items():
+            if value is not None:
+                field, bound = name.rsplit('_', 1)
+                lookups['%s_at__%s' % (field, 'gte' if bound == 'after' else 'lt')] = value
+        return Article.objects.filter(**lookups).order_by('id')
+
+    def iter_chunks(self) -> Iterator[List[dict]]:
+        """
+        Yields lists of article rows with nested `resources` and `comments`.
+        """
+        chunk = []
+        rows = self.get_queryset().values(*self.article_fields)
+        for row in rows.iterator(chunk_size=self.chunk_size):
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield self.join(chunk)
+                chunk = []
+
+        if chunk:
+            yield self.join(chunk)
+
+    def join(self, articles: List[dict]) -> List[dict]:
+        article_ids = [article['id'] for article in articles]
+        comments = list(
+            Comment.objects.filter(article_id__in=article_ids)
+            .order_by('id').values(*self.comment_fields)
+        )
+
+        resources = defaultdict(list)
+        comment_resources = defaultdict(list)
+        queryset = Resource.objects.filter(
+            Q(article_id__in=article_ids) | Q(comment__article_id__in=article_ids)
+        )
+        for resource in queryset.order_by('id').values(*self.resource_fields):
+            if resource['comment_id'] is not None:
+                comment_resources[resource['comment_id']].append(resource)
+            else:
+                resources[resource['article_id']].append(resource)
+
+        article_comments = defaultdict(list)
+        for comment in comments:
+            comment['resources'] = comment_resources[comment['id']]
+            article_comments[comment['article_id']].append(comment)
+
+        for article in articles:
+            article['resources'] = resources[article['id']]
+            article['comments'] = article_comments[article['id']]
+        return articles
+
+    def __iter__(self) -> Iterator[str]:
+        """
+        Yields rendered chunks.
+        """
+        if self.output == 'csv':
+            yield csv.writer(Echo()).writerow(self.csv_columns)
+
+        render = getattr(self, 'render_' + self.output)
+        for chunk in self.iter_chunks():
+            yield render(chunk)
+
+    def render_jsonl(self, articles):
+        return ''.join(
+            json.dumps(article, cls=JSONEncoder, ensure_ascii=False) + '\n'
+            for article in articles
+        )
+
+    def render_csv(self, articles):
+        writer = csv.writer(Echo())
+        rows = []
+        for article in articles:
+            rows.append(self.csv_row('article', article))
+            rows.extend(self.csv_row('resource', r) for r in article['resources'])
+            for comment in article['comments']:
+                rows.append(self.csv_row('comment', comment))
+                rows.extend(self.csv_row('resource', r) for r in comment['resources'])
+        return ''.join(writer.writerow(row) for row in rows)
+
+    def csv_row(self, record, values):
+        row = [record]
+        for column in self.csv_columns[1:]:
+            value = values.get(column)
+            if isinstance(value, datetime):
+                # Same representation as in JSON
+                value = self.encoder.default(value)
+            row.append(value)
+        return row
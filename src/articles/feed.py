@@ -0,0 +1,162 @@
+import time
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from core.routers import primary_reads
+from core.utils import cache_aget
+
+from .models import Article
+from .serializers import ArticleListSerializer
+
+
+class MainPageFeed:
+    """
+    Materialized main page.
+
+    Keeps `ArticleListSerializer` payloads of `MAIN_PAGE_FEED_SIZE` newest
+    articles with their keyset positions in a single cache entry:
+    `{'complete': bool, 'entries': [((created_at, id), payload), ...]}`.
+    Writes update the feed in place instead of rebuilding it,
+    and only one worker rebuilds it after a cold start.
+    Articles are always read from the default database, replicas may lag behind.
+
+    The entry expires after `MAIN_PAGE_FEED_TIMEOUT` seconds, which bounds
+    staleness of workers the cache isn't shared with.
+    """
+    key = 'main-page-feed'
+    lock_key = 'main-page-feed:lock'
+    dirty_key = 'main-page-feed:dirty'
+    lock_timeout = 10
+    lock_wait = 1
+    poll_interval = 0.01
+
+    @property
+    def cache(self):
+        return caches[settings.ARTICLE_CACHE_ALIAS]
+
+    @property
+    def size(self):
+        return settings.MAIN_PAGE_FEED_SIZE
+
+    @staticmethod
+    def get_position(entry):
+        return entry[0]
+
+    def load(self) -> Optional[dict]:
+        """
+        Returns the feed, rebuilds it if needed.
+        :return: feed or None if it is being rebuilt by other worker for too long
+        """
+        feed = self.cache.get(self.key)
+        if feed is not None:
+            return feed
+
+        if self._acquire(wait=0):
+            try:
+                feed = self.build()
+                self._store(feed)
+                return feed
+            finally:
+                self._release()
+
+        # Other worker is rebuilding the feed, wait for it
+        deadline = time.monotonic() + self.lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            feed = self.cache.get(self.key)
+            if feed is not None:
+                return feed
+
+        return None
+
+    async def aload(self) -> Optional[dict]:
+        feed = await cache_aget(self.cache, self.key)
+        if feed is not None:
+            return feed
+
+        # Rebuilding queries the database and waits for other workers
+        return await sync_to_async(self.load)()
+
+    def build(self) -> dict:
+        with primary_reads():
+            articles = list(Article.objects.order_by('-created_at', '-id')[:self.size])
+        return {
+            'complete': len(articles) < self.size,
+            'entries': self.make_entries(articles),
+        }
+
+    @staticmethod
+    def make_entries(articles) -> list:
+        payloads = ArticleListSerializer(articles, many=True).data
+        return [
+            ((article.created_at, article.pk), dict(payload))
+            for article, payload in zip(articles, payloads)
+        ]
+
+    def update(self, article_ids):
+        """
+        Applies current state of given articles to the feed.
+        Should be called after the transaction is committed.
+
+        The writing request doesn't wait for the lock: when it's taken,
+        the feed is dropped and marked dirty, so its holder drops the feed
+        it writes too and the next reader rebuilds it.
+        """
+        if not self._acquire(wait=0):
+            self.cache.set(self.dirty_key, True, self.lock_timeout)
+            self.clear()
+            return
+
+        try:
+            feed = self.cache.get(self.key)
+            if feed is None:
+                return
+
+            article_ids = set(article_ids)
+            entries = [e for e in feed['entries'] if e[0][1] not in article_ids]
+            boundary = entries[-1][0] if entries else None
+            with primary_reads():
+                live_articles = list(Article.objects.filter(pk__in=article_ids))
+
+            for entry in self.make_entries(live_articles):
+                # Feed must stay the leading part of the main page
+                if feed['complete'] or (boundary is not None and entry[0] > boundary):
+                    entries.append(entry)
+
+            entries.sort(key=self.get_position, reverse=True)
+            if len(entries) > self.size:
+                del entries[self.size:]
+                feed['complete'] = False
+
+            feed['entries'] = entries
+            self._store(feed)
+        finally:
+            self._release()
+
+    def clear(self):
+        self.cache.delete(self.key)
+
+    def _store(self, feed):
+        self.cache.set(self.key, feed, settings.MAIN_PAGE_FEED_TIMEOUT)
+        # Articles changed while the lock was held may be missing
+        if self.cache.get(self.dirty_key):
+            self.clear()
+
+    def _acquire(self, wait) -> bool:
+        deadline = time.monotonic() + wait
+        while not self.cache.add(self.lock_key, True, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.poll_interval)
+        # Holder reads articles committed before, so earlier marks are obsolete
+        self.cache.delete(self.dirty_key)
+        return True
+
+    def _release(self):
+        self.cache.delete(self.lock_key)
+
+
+main_page_feed = MainPageFeed()
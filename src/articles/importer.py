@@ -0,0 +1,173 @@
+import json
+import uuid
+from collections import Counter
+from typing import Iterable, List
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from core.utils import slugify_article
+
+from .models import Article, Comment, Resource
+from .signals import articles_changed
+
+UserModel = get_user_model()
+
+
+class ArticleImport:
+    """
+    Bulk import of articles with nested comments and resources from JSON Lines
+    in the format of `ArticleExport`, other keys (`id`, `slug`, dates) are ignored:
+    `{"title", "description", "text", "preview_image", "author_id",
+    "resources": [{"url", "type"}], "comments": [{"author_id", "text", "resources"}]}`.
+
+    Every chunk is inserted by a few `bulk_create` queries in its own transaction,
+    articles get reserved ids, so they are inserted with final slugs.
+    """
+    article_fields = ('title', 'description', 'text', 'preview_image')
+    comment_fields = ('text',)
+    resource_fields = ('url', 'type')
+
+    def __init__(self, chunk_size=1000):
+        self.chunk_size = chunk_size
+        self.counts = Counter()
+
+    def run(self, lines: Iterable[str]) -> Counter:
+        """
+        Imports all lines, chunks before an invalid line stay imported.
+        :param lines: JSON Lines
+        :return: numbers of imported articles, comments and resources
+        """
+        chunk = []
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+
+            chunk.append(self.parse(line_number, line))
+            if len(chunk) >= self.chunk_size:
+                self.insert(chunk)
+                chunk = []
+
+        if chunk:
+            self.insert(chunk)
+        return self.counts
+
+    def parse(self, line_number: int, line: str) -> dict:
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValidationError("Article must be an object.")
+
+            row = self.clean(Article, data, self.article_fields)
+            row['resources'] = self.clean_resources(data)
+            row['comments'] = []
+            for comment in data.get('comments') or []:
+                comment_row = self.clean(Comment, comment, self.comment_fields)
+                comment_row['resources'] = self.clean_resources(comment)
+                row['comments'].append(comment_row)
+            return row
+        except (ValueError, TypeError, AttributeError, ValidationError) as e:
+            messages = e.messages if isinstance(e, ValidationError) else [str(e)]
+            raise ValidationError("Line %d: %s" % (line_number, ' '.join(messages)))
+
+    def clean_resources(self, data):
+        return [
+            self.clean(Resource, resource, self.resource_fields)
+            for resource in data.get('resources') or []
+        ]
+
+    @staticmethod
+    def clean(model, data, fields) -> dict:
+        """
+        Runs model field validators, which are much cheaper than serializers.
+        """
+        row = {}
+        for name in fields:
+            field = model._meta.get_field(name)
+            try:
+                row[name] = field.clean(data.get(name), None)
+            except ValidationError as e:
+                raise ValidationError("%s: %s" % (name, ' '.join(e.messages)))
+
+        if model is not Resource:
+            author_id = data.get('author_id')
+            if not isinstance(author_id, int) or isinstance(author_id, bool):
+                raise ValidationError("author_id: must be an integer.")
+            row['author_id'] = author_id
+        return row
+
+    def insert(self, rows: List[dict]):
+        with transaction.atomic():
+            self.check_authors(rows)
+
+            articles = [
+                Article(
+                    author_id=row['author_id'],
+                    comment_count=len(row['comments']),
+                    resource_count=len(row['resources']),
+                    **{name: row[name] for name in self.article_fields}
+                ) for row in rows
+            ]
+            if Article.prepare_bulk_create(articles):
+                Article.objects.bulk_create(articles)
+            else:
+                self.insert_with_placeholder_slugs(articles)
+
+            comments = [
+                Comment(article_id=article.pk, author_id=comment['author_id'], text=comment['text'])
+                for article, row in zip(articles, rows) for comment in row['comments']
+            ]
+            Comment.objects.bulk_create(comments)
+            if comments and comments[0].pk is None:
+                # Backend doesn't return ids, new articles have only these comments
+                comment_ids = Comment.objects.filter(
+                    article_id__in=[article.pk for article in articles]
+                ).order_by('pk').values_list('pk', flat=True)
+                for comment, pk in zip(comments, comment_ids):
+                    comment.pk = pk
+
+            comment_rows = (comment for row in rows for comment in row['comments'])
+            resources = [
+                Resource(article_id=article.pk, **resource)
+                for article, row in zip(articles, rows) for resource in row['resources']
+            ] + [
+                Resource(comment_id=comment.pk, **resource)
+                for comment, row in zip(comments, comment_rows) for resource in row['resources']
+            ]
+            Resource.objects.bulk_create(resources)
+
+            # `bulk_create` doesn't send `post_save`
+            articles_changed.send(sender=Article, article_ids=[article.pk for article in articles])
+
+        self.counts.update(articles=len(articles), comments=len(comments), resources=len(resources))
+
+    @staticmethod
+    def check_authors(rows):
+        author_ids = {row['author_id'] for row in rows} | {
+            comment['author_id'] for row in rows for comment in row['comments']
+        }
+        existing = set(UserModel.objects.filter(pk__in=author_ids).values_list('pk', flat=True))
+        missing = author_ids - existing
+        if missing:
+            raise ValidationError("Unknown authors: %s" % ', '.join(sorted(map(str, missing))))
+
+    @staticmethod
+    def insert_with_placeholder_slugs(articles):
+        # Unique placeholders until ids are known
+        for article in articles:
+            article.slug = uuid.uuid4().hex
+        Article.objects.bulk_create(articles)
+
+        if articles[0].pk is None:
+            ids = dict(
+                Article.objects.filter(
+                    slug__in=[article.slug for article in articles]
+                ).values_list('slug', 'pk')
+            )
+            for article in articles:
+                article.pk = ids[article.slug]
+
+        for article in articles:
+            article.slug = slugify_article(article.pk, article.title)
+        Article.objects.bulk_update(articles, ['slug'])
@@ -0,0 +1,81 @@
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from articles.benchmark import create_fixtures
+from articles.cache import article_cache
+from articles.feed import main_page_feed
+from articles.models import Article
+from articles.view_counter import view_counter
+from core.benchmark import create_benchmark_user, run_asgi, run_wsgi
+from core.utils import slugify_article
+
+
+class Command(BaseCommand):
+    help = "Compares throughput of concurrent read requests served by WSGI " \
+           "and ASGI handlers in process. Test data is committed and deleted afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100)
+        parser.add_argument('--comments', type=int, default=10)
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=20)
+
+    def handle(self, *args, **options):
+        # Threads and the event loop use their own connections,
+        # so fixtures can't be rolled back
+        author = create_benchmark_user()
+        article_ids = create_fixtures(options['articles'], options['comments'], 2, author)
+        try:
+            with override_settings(ALLOWED_HOSTS=['127.0.0.1']):
+                self.compare(author, article_ids, options['requests'], options['concurrency'])
+        finally:
+            Article.include_deleted.filter(pk__in=article_ids).hard_delete()
+            author.delete()
+            article_cache.invalidate(article_ids)
+            main_page_feed.clear()
+            view_counter.clear()
+
+    def compare(self, author, article_ids, requests, concurrency):
+        # Responses are cached by the article id prefix of slugs
+        articles = list(Article.objects.filter(pk__in=article_ids).only('pk', 'title'))
+        for article in articles:
+            article.slug = slugify_article(article.pk, article.title)
+        Article.objects.bulk_update(articles, ['slug'])
+        slugs = [article.slug for article in articles]
+
+        endpoints = {
+            "Article detail": [
+                ('article-detail', {'slug': slugs[i % len(slugs)]}) for i in range(requests)
+            ],
+            "Main page": [('main-page', {})] * requests,
+            "User": [('user-detail', {'username': author.username})] * requests,
+        }
+        namespaces = {
+            'article-detail': 'articles',
+            'main-page': 'articles',
+            'user-detail': 'api-auth',
+        }
+        wsgi_application = get_wsgi_application()
+        asgi_application = get_asgi_application()
+
+        for title, names in endpoints.items():
+            sync_paths = [reverse('%s:%s' % (namespaces[name], name), kwargs=kwargs) for name, kwargs in names]
+            async_paths = [
+                reverse('%s-async:%s' % (namespaces[name], name), kwargs=kwargs) for name, kwargs in names
+            ]
+
+            results = [
+                ("WSGI", run_wsgi(wsgi_application, sync_paths, concurrency)),
+                ("ASGI sync views", run_asgi(asgi_application, sync_paths, concurrency)),
+                ("ASGI async views", run_asgi(asgi_application, async_paths, concurrency)),
+            ]
+
+            self.stdout.write("%s, %d requests, concurrency %d:" % (title, requests, concurrency))
+            for name, (seconds, statuses) in results:
+                errors = sum(1 for status in statuses if status >= 400)
+                self.stdout.write("  %s: %.0f requests/sec%s" % (
+                    name, len(statuses) / seconds, ", %d errors" % errors if errors else ""
+                ))
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from articles.benchmark import make_import_rows
+from articles.importer import ArticleImport
+from articles.serializers import ArticleCreateRetrieveSerializer, CommentCreateRetrieveSerializer
+from core.benchmark import create_benchmark_user, measure, rollback
+
+
+class Command(BaseCommand):
+    help = "Compares throughput of `import_articles` with creating articles " \
+           "by serializers. Test data is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=5)
+        parser.add_argument('--resources', type=int, default=2)
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with rollback():
+            author = create_benchmark_user()
+            rows = make_import_rows(
+                options['articles'], options['comments'], options['resources'], author.pk
+            )
+            lines = [json.dumps(row) for row in rows]
+            count = options['articles'] * (1 + options['resources']) * (1 + options['comments'])
+
+            with rollback():
+                serializer_time = measure(lambda: self.create_by_serializers(rows, author), 1)
+            with rollback():
+                import_time = measure(
+                    lambda: ArticleImport(options['chunk_size']).run(lines), 1
+                )
+
+        self.stdout.write(
+            "%d rows: serializers %.0f rows/sec, import %.0f rows/sec, speedup %.1fx" % (
+                count, count / serializer_time, count / import_time,
+                serializer_time / import_time
+            )
+        )
+
+    @staticmethod
+    def create_by_serializers(rows, author):
+        for row in rows:
+            serializer = ArticleCreateRetrieveSerializer(data=row, context={'user': author})
+            serializer.is_valid(raise_exception=True)
+            article = serializer.save()
+
+            for comment in row['comments']:
+                serializer = CommentCreateRetrieveSerializer(
+                    data=comment, context={'user': author, 'article': article}
+                )
+                serializer.is_valid(raise_exception=True)
+                serializer.save()
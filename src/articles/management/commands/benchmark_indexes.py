@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from articles.benchmark import create_fixtures
+from articles.models import Article, Comment, Resource
+from core.benchmark import measure, rollback
+
+
+class Command(BaseCommand):
+    help = "Shows query plans and latencies of article queries without " \
+           "and with partial indexes of live rows. Test data is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=20)
+        parser.add_argument('--resources', type=int, default=2)
+        parser.add_argument(
+            '--deleted', type=float, default=0.5,
+            help="Share of soft deleted articles."
+        )
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with rollback():
+            article_ids = create_fixtures(
+                options['articles'], options['comments'], options['resources']
+            )
+            step = max(int(1 / options['deleted']), 1) if options['deleted'] else 0
+            if step:
+                Article.objects.filter(pk__in=article_ids[::step]).delete()
+
+            article_id = Article.objects.filter(pk__in=article_ids).latest('created_at').pk
+            comment_ids = list(
+                Comment.objects.filter(article_id=article_id).values_list('pk', flat=True)
+            )
+            queries = {
+                "Main page": Article.objects.order_by('-created_at', '-id')[:20],
+                "Comments of article": Comment.objects.filter(
+                    article_id=article_id
+                ).order_by('-created_at', '-id')[:20],
+                "Resources of articles": Resource.objects.filter(article_id__in=article_ids[:20]),
+                "Resources of comments": Resource.objects.filter(comment_id__in=comment_ids),
+            }
+
+            indexes = [
+                (model, index) for model in (Article, Comment, Resource)
+                for index in model._meta.indexes if index.condition is not None
+            ]
+
+            # Statements are executed directly, because SQLite schema
+            # editor can't be used in transaction
+            editor = connection.schema_editor()
+            self.execute_sql([
+                'DROP INDEX %s' % connection.ops.quote_name(index.name) for model, index in indexes
+            ])
+            before = self.run_queries(queries, options['repeat'])
+            self.execute_sql([index.create_sql(model, editor) for model, index in indexes])
+            after = self.run_queries(queries, options['repeat'])
+
+        for title in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(title))
+            for name, results in (("without", before), ("with", after)):
+                plan, elapsed = results[title]
+                self.stdout.write("  %s partial indexes: %.3f ms" % (name, elapsed * 1000))
+                for line in plan.splitlines():
+                    self.stdout.write("    " + line)
+
+    @staticmethod
+    def execute_sql(statements):
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(str(statement))
+
+    def run_queries(self, queries, repeat):
+        return {
+            title: (queryset.explain(), measure(lambda: list(queryset.all()), repeat))
+            for title, queryset in queries.items()
+        }
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+
+from articles.benchmark import create_fixtures
+from articles.models import Article
+from articles.serializers import ArticleCreateRetrieveSerializer, ArticleListSerializer
+from core.benchmark import measure, rollback
+from core.mixins import build_query_plan
+from core.serializers import ValuesSerializer
+
+
+class Command(BaseCommand):
+    help = "Compares DRF serializers with values serializers of articles. " \
+           "Test data is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100)
+        parser.add_argument('--comments', type=int, default=100)
+        parser.add_argument('--resources', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with rollback():
+            article_ids = create_fixtures(
+                options['articles'], options['comments'], options['resources']
+            )
+            queryset = Article.objects.filter(pk__in=article_ids)
+
+            self.compare(
+                "List of %d articles" % len(article_ids),
+                ArticleListSerializer(),
+                queryset,
+                options['repeat'],
+            )
+            self.compare(
+                "Article with %d comments" % options['comments'],
+                ArticleCreateRetrieveSerializer(),
+                queryset.filter(pk=article_ids[0]),
+                options['repeat'],
+            )
+
+    def compare(self, title, serializer, queryset, repeat):
+        model = serializer.Meta.model
+        serializer_queryset = build_query_plan(serializer, model).apply(queryset)
+        values_serializer = ValuesSerializer.compile(serializer, model)
+
+        serializer_time = measure(
+            lambda: type(serializer)(serializer_queryset, many=True).data, repeat
+        )
+        values_time = measure(
+            lambda: values_serializer.render(values_serializer.fetch(queryset)), repeat
+        )
+
+        self.stdout.write(
+            "%s: serializer %.2f ms, values %.2f ms, speedup %.1fx" % (
+                title, serializer_time * 1000, values_time * 1000, serializer_time / values_time
+            )
+        )
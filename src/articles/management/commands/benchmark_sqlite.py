@@ -0,0 +1,72 @@
+import random
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test.utils import override_settings
+
+from articles.benchmark import create_fixtures
+from articles.cache import article_cache
+from articles.feed import main_page_feed
+from articles.models import Article, Comment
+from core.benchmark import create_benchmark_user, run_threads
+
+
+class Command(BaseCommand):
+    help = "Compares SQLite defaults with `SQLITE_PRAGMAS` profile under concurrent " \
+           "comment writes and article reads. Test data is committed and deleted afterwards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Default database isn't SQLite.")
+
+        author = create_benchmark_user()
+        article_ids = create_fixtures(20, 10, author=author)
+        profiles = {
+            # Journal mode is stored in the database file, so it's reset explicitly
+            "SQLite defaults": {'journal_mode': 'delete'},
+            "SQLITE_PRAGMAS": settings.SQLITE_PRAGMAS,
+        }
+
+        def write():
+            Comment.objects.create(
+                article_id=random.choice(article_ids), author=author, text='Benchmark comment'
+            )
+
+        def read():
+            list(Article.objects.filter(pk__in=article_ids).order_by('-created_at', '-id').values(
+                'id', 'title', 'description', 'comment_count'
+            ))
+            list(Comment.objects.filter(article_id=random.choice(article_ids)).values('id', 'text'))
+
+        try:
+            for title, pragmas in profiles.items():
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    # New connections get the profile
+                    connections.close_all()
+                    results = run_threads(options['duration'], {
+                        'writes': (write, options['writers']),
+                        'reads': (read, options['readers']),
+                    })
+                self.report(title, results, options['duration'])
+        finally:
+            connections.close_all()
+            Article.include_deleted.filter(pk__in=article_ids).hard_delete()
+            # Comments written by the benchmark are deleted with their author
+            author.delete()
+            article_cache.invalidate(article_ids)
+            main_page_feed.clear()
+
+    def report(self, title, results, duration):
+        self.stdout.write("%s:" % title)
+        for name, (latencies, errors) in results.items():
+            latencies.sort()
+            p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0
+            self.stdout.write("  %s: %.0f/sec, p99 %.1f ms, %d errors" % (
+                name, len(latencies) / duration, p99 * 1000, errors
+            ))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.export import ArticleExport, ExportFilterSerializer
+
+
+class Command(BaseCommand):
+    help = "Exports articles with comments and resources as JSON Lines or CSV."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default='jsonl', help="jsonl or csv.")
+        parser.add_argument('--file', help="Output file, standard output by default.")
+        parser.add_argument('--created-after')
+        parser.add_argument('--created-before')
+        parser.add_argument('--updated-after')
+        parser.add_argument('--updated-before')
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Number of articles fetched at once."
+        )
+
+    def handle(self, *args, **options):
+        names = ('output', 'created_after', 'created_before', 'updated_after', 'updated_before')
+        serializer = ExportFilterSerializer(
+            data={name: options[name] for name in names if options[name] is not None}
+        )
+        if not serializer.is_valid():
+            raise CommandError(serializer.errors)
+
+        export = ArticleExport(chunk_size=options['chunk_size'], **serializer.validated_data)
+        if options['file'] is None:
+            for chunk in export:
+                self.stdout.write(chunk, ending='')
+            return
+
+        with open(options['file'], 'w', encoding='utf-8', newline='') as file:
+            for chunk in export:
+                file.write(chunk)
@@ -0,0 +1,43 @@
+import sys
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.importer import ArticleImport
+
+
+class Command(BaseCommand):
+    help = "Imports articles with comments and resources from JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help="JSON Lines file, `-` for standard input.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Number of articles inserted in one transaction."
+        )
+
+    def handle(self, *args, **options):
+        importer = ArticleImport(chunk_size=options['chunk_size'])
+        start = time.perf_counter()
+
+        try:
+            if options['file'] == '-':
+                counts = importer.run(sys.stdin)
+            else:
+                with open(options['file'], encoding='utf-8') as file:
+                    counts = importer.run(file)
+        except ValidationError as e:
+            raise CommandError(
+                "%s Imported %d articles before the error." % (
+                    ' '.join(e.messages), importer.counts['articles']
+                )
+            )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            "Imported %d articles, %d comments, %d resources (%.0f rows/sec)." % (
+                counts['articles'], counts['comments'], counts['resources'],
+                sum(counts.values()) / elapsed if elapsed else 0
+            )
+        ))
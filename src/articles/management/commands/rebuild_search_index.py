@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from articles.models import Article
+from articles.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuilds full-text search index of articles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Number of articles indexed at once."
+        )
+
+    def handle(self, *args, **options):
+        # The old index is replaced when all articles are indexed
+        queryset = Article.objects.only('title', 'description', 'text')
+        count = get_search_backend().rebuild(
+            queryset.iterator(chunk_size=options['chunk_size']), options['chunk_size']
+        )
+
+        self.stdout.write(self.style.SUCCESS("Indexed %d articles." % count))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from articles.counters import reconcile_counters
+from articles.models import Article
+from articles.signals import articles_changed
+
+
+class Command(BaseCommand):
+    help = "Fixes comment and resource counters of articles which differ from actual numbers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help="Number of articles checked in one transaction."
+        )
+
+    def handle(self, *args, **options):
+        article_ids = Article.include_deleted.order_by('pk').values_list('pk', flat=True)
+        last_pk, fixed = 0, 0
+
+        while True:
+            chunk = list(article_ids.filter(pk__gt=last_pk)[:options['chunk_size']])
+            if not chunk:
+                break
+
+            with transaction.atomic():
+                drifted = reconcile_counters(chunk)
+                if drifted:
+                    articles_changed.send(sender=Article, article_ids=drifted)
+
+            fixed += len(drifted)
+            last_pk = chunk[-1]
+
+        self.stdout.write(self.style.SUCCESS("Fixed %d articles." % fixed))
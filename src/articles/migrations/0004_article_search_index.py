@@ -0,0 +1,31 @@
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    schema_editor.execute(
+        'CREATE VIRTUAL TABLE articles_article_fts USING fts5('
+        'title, description, text, tokenize="unicode61 remove_diacritics 2")'
+    )
+    schema_editor.execute(
+        'INSERT INTO articles_article_fts (rowid, title, description, text) '
+        'SELECT id, title, description, text FROM articles_article WHERE NOT is_deleted'
+    )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE articles_article_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_article_updated_at_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
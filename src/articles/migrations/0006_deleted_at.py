@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:15
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def set_deleted_at(apps, schema_editor):
+    # Last update of deleted rows is the best known deletion time
+    for name in ('Article', 'Comment'):
+        apps.get_model('articles', name).objects.filter(
+            is_deleted=True
+        ).update(deleted_at=F('updated_at'))
+
+    apps.get_model('articles', 'Resource').objects.filter(
+        is_deleted=True
+    ).update(deleted_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_live_partial_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date and time of deleting'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date and time of deleting'),
+        ),
+        migrations.AddField(
+            model_name='resource',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date and time of deleting'),
+        ),
+        migrations.RunPython(set_deleted_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:18
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_live_rows(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    counters = {}
+    for field, name in (('comment_count', 'Comment'), ('resource_count', 'Resource')):
+        model = apps.get_model('articles', name)
+        counters[field] = Coalesce(Subquery(
+            model.objects.filter(article=OuterRef('pk'), is_deleted=False)
+            .order_by().values('article').annotate(count=Count('pk')).values('count')
+        ), Value(0))
+
+    Article.objects.update(**counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Number of comments'),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='resource_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Number of resources'),
+        ),
+        migrations.RunPython(count_live_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+from unidecode import unidecode
+
+
+def transliterate_fts_table(apps, schema_editor):
+    # Search queries are transliterated, so must be the indexed text
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+
+    Article = apps.get_model('articles', 'Article')
+    articles = Article.objects.filter(is_deleted=False).values_list(
+        'id', 'title', 'description', 'text'
+    )
+    rows = [
+        (pk, unidecode(title), unidecode(description), unidecode(text))
+        for pk, title, description, text in articles.iterator()
+    ]
+    schema_editor.execute('DELETE FROM articles_article_fts')
+    if rows:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(
+                'INSERT INTO articles_article_fts (rowid, title, description, text) '
+                'VALUES (%s, %s, %s, %s)',
+                rows
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0008_article_view_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(transliterate_fts_table, migrations.RunPython.noop),
+    ]
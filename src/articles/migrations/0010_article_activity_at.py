@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_transliterate_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='activity_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Date and time of last activity'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['activity_at'], name='article_activity_at_idx'),
+        ),
+    ]
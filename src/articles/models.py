@@ -1,8 +1,12 @@
-from django.db import models
+import uuid
+
+from django.db import models, router, transaction
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
+from core.db import reserve_ids
 from core.models import TimestampedModel, DeletableModel
 from core.utils import slugify_article
 
@@ -32,22 +36,98 @@ class Article(TimestampedModel, DeletableModel):
         on_delete=models.CASCADE,
         related_name='articles'
     )
+    # Live comments and own resources, kept by `articles.counters`
+    comment_count = models.PositiveIntegerField(_('Number of comments'), default=0)
+    resource_count = models.PositiveIntegerField(_('Number of resources'), default=0)
+    # Written behind by `articles.view_counter`
+    view_count = models.PositiveIntegerField(_('Number of views'), default=0)
+    # Last change of counters, `updated_at` is changed by edits only
+    activity_at = models.DateTimeField(_('Date and time of last activity'), null=True, blank=True)
+
+    soft_delete_cascade = ('comments', 'resources')
 
     class Meta:
         verbose_name = _('article')
         verbose_name_plural = _('articles')
         ordering = ('-created_at',)
+        indexes = (
+            # Keyset of the main page pagination over live articles
+            models.Index(
+                fields=('created_at', 'id'),
+                name='article_live_created_idx',
+                condition=Q(is_deleted=False)
+            ),
+            # Last modification of the main page
+            models.Index(fields=('updated_at',), name='article_updated_at_idx'),
+            models.Index(fields=('activity_at',), name='article_activity_at_idx'),
+        )
 
     def __str__(self):
         return self.title
 
-    def save(self, *args, **kwargs):
-        self.slug = slugify_article(self.id, self.title)
-        return super().save(*args, **kwargs)
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Slug is recomputed only when the title is changed
+        if 'title' in field_names:
+            instance._slug_title = instance.title
+        return instance
 
-    def delete(self, using=None, keep_parents=False):
-        self.is_deleted = True
-        self.save()
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            return self._save_with_slug(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(Article, instance=self)
+        # Reservation and insert are committed together, so a failed insert
+        # leaves no gap in the SQLite sequence
+        with transaction.atomic(using=using, savepoint=False):
+            ids = reserve_ids(Article, 1, using)
+            if ids is None:
+                return self._save_with_placeholder_slug(*args, **kwargs)
+
+            self.pk = ids[0]
+            # Otherwise Django tries UPDATE first because the pk is set
+            kwargs['force_insert'] = True
+            try:
+                self._save_with_slug(*args, **kwargs)
+            except Exception:
+                self.pk = None
+                raise
+
+    def _save_with_slug(self, *args, **kwargs):
+        if 'title' not in self.get_deferred_fields() and \
+                (self.title != getattr(self, '_slug_title', None) or not self.slug):
+            self.slug = slugify_article(self.pk, self.title)
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'slug'}
+
+        super().save(*args, **kwargs)
+        self._slug_title = self.title
+
+    def _save_with_placeholder_slug(self, *args, **kwargs):
+        # Database can't reserve ids, so unique slug is known after insert only
+        self.slug = uuid.uuid4().hex
+        super().save(*args, **kwargs)
+        self.slug = slugify_article(self.pk, self.title)
+        super().save(update_fields=['slug'], using=kwargs.get('using'))
+        self._slug_title = self.title
+
+    @classmethod
+    def prepare_bulk_create(cls, articles, using=None) -> bool:
+        """
+        Assigns reserved ids and slugs to new articles,
+        so `bulk_create` inserts them in final state.
+        :return: False if the database can't reserve ids
+        """
+        ids = reserve_ids(cls, len(articles), using)
+        if ids is None:
+            return False
+
+        for article, pk in zip(articles, ids):
+            article.pk = pk
+            article.slug = slugify_article(pk, article.title)
+            article._slug_title = article.title
+        return True
 
     def get_absolute_url(self):
         return reverse(
@@ -69,10 +149,20 @@ class Comment(TimestampedModel, DeletableModel):
     )
     text = models.TextField(_('Comment text'), max_length=512)
 
+    soft_delete_cascade = ('resources',)
+
     class Meta:
         verbose_name = _('comment')
         verbose_name_plural = _('comments')
         ordering = ('-created_at',)
+        indexes = (
+            # Keyset pagination of live comments of an article
+            models.Index(
+                fields=('article', 'created_at', 'id'),
+                name='comment_live_article_idx',
+                condition=Q(is_deleted=False)
+            ),
+        )
 
 
 class Resource(DeletableModel):
@@ -102,3 +192,16 @@ class Resource(DeletableModel):
     class Meta:
         verbose_name = _('image')
         verbose_name_plural = _('images')
+        indexes = (
+            # Live resources of prefetched articles and comments
+            models.Index(
+                fields=('article', 'id'),
+                name='resource_live_article_idx',
+                condition=Q(is_deleted=False)
+            ),
+            models.Index(
+                fields=('comment', 'id'),
+                name='resource_live_comment_idx',
+                condition=Q(is_deleted=False)
+            ),
+        )
@@ -0,0 +1,110 @@
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from core.signals import restored, soft_deleted
+
+from .cache import article_cache
+from .counters import change_counters, reconcile_counters
+from .feed import main_page_feed
+from .models import Article, Comment, Resource
+from .search import get_search_backend
+from .signals import articles_changed
+
+
+@receiver(post_save, sender=Article)
+def article_saved(sender, instance, **kwargs):
+    articles_changed.send(sender=sender, article_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created and not instance.is_deleted:
+        change_counters('comment_count', {instance.article_id: 1})
+    articles_changed.send(sender=sender, article_ids=[instance.article_id])
+
+
+@receiver(post_save, sender=Resource)
+def resource_saved(sender, instance, created, **kwargs):
+    if instance.article_id is not None:
+        if created and not instance.is_deleted:
+            change_counters('resource_count', {instance.article_id: 1})
+        article_ids = [instance.article_id]
+    else:
+        article_ids = Comment.include_deleted.filter(
+            pk=instance.comment_id
+        ).values_list('article_id', flat=True)
+
+    articles_changed.send(sender=sender, article_ids=list(article_ids))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def author_saved(sender, instance, created, update_fields, **kwargs):
+    # Usernames of authors of articles and their comments are rendered
+    if created or (update_fields is not None and 'username' not in update_fields):
+        return
+
+    article_ids = Article.objects.filter(
+        Q(author=instance) | Q(comments__author=instance)
+    ).values_list('pk', flat=True).distinct()
+    articles_changed.send(sender=sender, article_ids=list(article_ids))
+
+
+def get_deltas(article_ids, signal) -> Counter:
+    sign = -1 if signal is soft_deleted else 1
+    deltas = Counter()
+    for article_id in article_ids:
+        deltas[article_id] += sign
+    return deltas
+
+
+@receiver([soft_deleted, restored], sender=Article)
+def articles_deleted_or_restored(sender, pks, **kwargs):
+    # Comments and resources are changed by cascade
+    reconcile_counters(pks)
+    articles_changed.send(sender=sender, article_ids=list(pks))
+
+
+@receiver([soft_deleted, restored], sender=Comment)
+def comments_deleted_or_restored(sender, pks, signal, **kwargs):
+    article_ids = Comment.include_deleted.filter(pk__in=pks).values_list('article_id', flat=True)
+    change_counters('comment_count', get_deltas(article_ids, signal))
+    articles_changed.send(sender=sender, article_ids=list(set(article_ids)))
+
+
+@receiver([soft_deleted, restored], sender=Resource)
+def resources_deleted_or_restored(sender, pks, signal, **kwargs):
+    article_ids, owner_ids = set(), []
+    resources = Resource.include_deleted.filter(pk__in=pks)
+    for article_id, comment_article_id in resources.values_list('article_id', 'comment__article_id'):
+        article_ids.add(article_id or comment_article_id)
+        owner_ids.append(article_id)
+
+    change_counters('resource_count', get_deltas(owner_ids, signal))
+
+    articles_changed.send(sender=sender, article_ids=list(article_ids - {None}))
+
+
+@receiver(articles_changed)
+def invalidate_article_cache(sender, article_ids, **kwargs):
+    article_cache.invalidate(article_ids)
+
+    # Readers can cache old content again until transaction is committed
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: article_cache.invalidate(article_ids))
+
+
+@receiver(articles_changed)
+def update_main_page_feed(sender, article_ids, **kwargs):
+    # Payloads include counters of comments and resources.
+    # Feed reads articles back, so it must see committed data
+    transaction.on_commit(lambda: main_page_feed.update(article_ids))
+
+
+@receiver(articles_changed, sender=Article)
+def update_search_index(sender, article_ids, **kwargs):
+    transaction.on_commit(lambda: get_search_backend().update(article_ids))
@@ -0,0 +1,314 @@
+import math
+import os
+import re
+import shelve
+import tempfile
+import threading
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from unidecode import unidecode
+
+from .models import Article
+
+# Weights of `title`, `description` and `text` in ranking
+FIELD_WEIGHTS = (10.0, 5.0, 1.0)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into transliterated lowercase words.
+    :param text: raw text
+    :return: list of words
+    """
+    return WORD_RE.findall(unidecode(text).lower())
+
+
+class BaseSearchBackend:
+    """
+    Inverted index of articles.
+
+    `search` returns `(article_id, score)` pairs ordered by `(score, article_id)`,
+    the lower score is the better match.
+    """
+    def index(self, articles: Iterable[Article]):
+        raise NotImplementedError("`index()` must be implemented.")
+
+    def remove(self, article_ids: Iterable[int]):
+        raise NotImplementedError("`remove()` must be implemented.")
+
+    def clear(self):
+        raise NotImplementedError("`clear()` must be implemented.")
+
+    def rebuild(self, articles: Iterable[Article], chunk_size: int = 1000) -> int:
+        """
+        Replaces the index by given articles, searches see the old index until it's done.
+        :param articles: all articles
+        :param chunk_size: number of articles indexed at once
+        :return: number of indexed articles
+        """
+        raise NotImplementedError("`rebuild()` must be implemented.")
+
+    def index_chunks(self, articles: Iterable[Article], chunk_size: int) -> int:
+        chunk, count = [], 0
+        for article in articles:
+            chunk.append(article)
+            if len(chunk) >= chunk_size:
+                self.index(chunk)
+                count += len(chunk)
+                chunk = []
+
+        self.index(chunk)
+        return count + len(chunk)
+
+    def search(
+            self, query: str, position: Optional[tuple] = None,
+            reverse: bool = False, limit: int = 20
+    ) -> List[Tuple[int, float]]:
+        """
+        :param query: raw search query
+        :param position: `(score, article_id)` to search after (before if `reverse`)
+        :param reverse: search backwards from position
+        :param limit: max number of results
+        :return: list of `(article_id, score)`
+        """
+        raise NotImplementedError("`search()` must be implemented.")
+
+    def update(self, article_ids: Iterable[int]):
+        """
+        Applies current state of given articles to the index.
+        """
+        article_ids = set(article_ids)
+        articles = list(
+            Article.objects.filter(pk__in=article_ids).only('title', 'description', 'text')
+        )
+        self.remove(article_ids)
+        self.index(articles)
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+    Index in FTS5 virtual table created by migrations of SQLite databases.
+    Results are ranked by bm25.
+
+    Text is indexed transliterated like search queries are,
+    so words of any script are found by their original or Latin spelling.
+    """
+    table = 'articles_article_fts'
+
+    def __init__(self):
+        if connection.vendor != 'sqlite':
+            raise ImproperlyConfigured(
+                "SQLiteFTSBackend requires SQLite database, not %s." % connection.vendor
+            )
+
+    def index(self, articles):
+        rows = [
+            (a.pk, unidecode(a.title), unidecode(a.description), unidecode(a.text))
+            for a in articles
+        ]
+        if rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    'INSERT INTO %s (rowid, title, description, text) '
+                    'VALUES (%%s, %%s, %%s, %%s)' % self.table,
+                    rows
+                )
+
+    def remove(self, article_ids):
+        article_ids = list(article_ids)
+        if article_ids:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM %s WHERE rowid IN (%s)' % (
+                        self.table, ', '.join(['%s'] * len(article_ids))
+                    ),
+                    article_ids
+                )
+
+    def clear(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM %s' % self.table)
+
+    def rebuild(self, articles, chunk_size=1000):
+        with transaction.atomic():
+            self.clear()
+            return self.index_chunks(articles, chunk_size)
+
+    def search(self, query, position=None, reverse=False, limit=20):
+        words = tokenize(query)
+        if not words:
+            return []
+
+        # Quoted words are matched literally and joined by AND
+        params = [' '.join('"%s"' % word for word in words)]
+        sql = (
+            'SELECT article_id, score FROM ('
+            'SELECT rowid AS article_id, bm25(%s, %s) AS score '
+            'FROM %s WHERE %s MATCH %%s)' % (
+                self.table, ', '.join(map(str, FIELD_WEIGHTS)), self.table, self.table
+            )
+        )
+
+        if position is not None:
+            operator = '<' if reverse else '>'
+            sql += ' WHERE score %s %%s OR (score = %%s AND article_id %s %%s)' % (
+                operator, operator
+            )
+            params += [position[0], position[0], position[1]]
+
+        direction = 'DESC' if reverse else 'ASC'
+        sql += ' ORDER BY score %s, article_id %s LIMIT %%s' % (direction, direction)
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class PythonIndexBackend(BaseSearchBackend):
+    """
+    Pure Python index in `shelve` file, works with any database.
+    Results are ranked by bm25 with field weights applied to term frequencies.
+
+    The file can be written by a single process only.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, path=None):
+        self.path = path or settings.ARTICLE_SEARCH_INDEX_PATH
+        self._lock = threading.Lock()
+
+    def _open(self, flag='c'):
+        return shelve.open(self.path, flag)
+
+    @staticmethod
+    def get_terms(article) -> Counter:
+        terms = Counter()
+        for weight, value in zip(FIELD_WEIGHTS, (article.title, article.description, article.text)):
+            for word in tokenize(value):
+                terms[word] += weight
+        return terms
+
+    def index(self, articles):
+        with self._lock, self._open() as shelf:
+            meta = shelf.get('meta', {'count': 0, 'length': 0})
+            for article in articles:
+                self._remove(shelf, meta, article.pk)
+
+                terms = self.get_terms(article)
+                length = sum(terms.values())
+                shelf['d:%d' % article.pk] = {'terms': list(terms), 'length': length}
+                for term, frequency in terms.items():
+                    postings = shelf.get('t:' + term, {})
+                    postings[article.pk] = frequency
+                    shelf['t:' + term] = postings
+
+                meta['count'] += 1
+                meta['length'] += length
+            shelf['meta'] = meta
+
+    def remove(self, article_ids):
+        with self._lock, self._open() as shelf:
+            meta = shelf.get('meta', {'count': 0, 'length': 0})
+            for article_id in article_ids:
+                self._remove(shelf, meta, article_id)
+            shelf['meta'] = meta
+
+    @staticmethod
+    def _remove(shelf, meta, article_id):
+        document = shelf.pop('d:%d' % article_id, None)
+        if document is None:
+            return
+
+        for term in document['terms']:
+            postings = shelf.get('t:' + term, {})
+            postings.pop(article_id, None)
+            if postings:
+                shelf['t:' + term] = postings
+            else:
+                shelf.pop('t:' + term, None)
+
+        meta['count'] -= 1
+        meta['length'] -= document['length']
+
+    def clear(self):
+        with self._lock, self._open('n'):
+            pass
+
+    def rebuild(self, articles, chunk_size=1000):
+        directory, name = os.path.split(os.path.abspath(self.path))
+        with tempfile.TemporaryDirectory(dir=directory) as temp:
+            count = PythonIndexBackend(os.path.join(temp, name)).index_chunks(articles, chunk_size)
+            # `dbm` modules may keep the shelf in several files (`.dat`, `.dir`, ...)
+            with self._lock:
+                for filename in os.listdir(temp):
+                    os.replace(os.path.join(temp, filename), os.path.join(directory, filename))
+        return count
+
+    def search(self, query, position=None, reverse=False, limit=20):
+        words = set(tokenize(query))
+        if not words:
+            return []
+
+        with self._lock, self._open() as shelf:
+            meta = shelf.get('meta')
+            postings = [shelf.get('t:' + word) for word in words]
+            if not meta or not all(postings):
+                return []
+
+            # All words must be found like in FTS queries
+            article_ids = set.intersection(*(set(p) for p in postings))
+            lengths = {pk: shelf['d:%d' % pk]['length'] for pk in article_ids}
+
+        average_length = meta['length'] / meta['count']
+        scores = Counter()
+        for term_postings in postings:
+            idf = math.log(1 + (meta['count'] - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+            for pk in article_ids:
+                frequency = term_postings[pk]
+                norm = self.k1 * (1 - self.b + self.b * lengths[pk] / average_length)
+                scores[pk] -= idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        results = sorted(((score, pk) for pk, score in scores.items()), reverse=reverse)
+        if position is not None:
+            results = [
+                r for r in results if (r < tuple(position) if reverse else r > tuple(position))
+            ]
+
+        return [(pk, score) for score, pk in results[:limit]]
+
+
+_backend = None
+
+
+def get_search_backend() -> BaseSearchBackend:
+    """
+    Returns `ARTICLE_SEARCH_BACKEND`, by default FTS5 index
+    of SQLite database or Python index of other databases.
+    """
+    global _backend
+    if _backend is None:
+        if settings.ARTICLE_SEARCH_BACKEND:
+            _backend = import_string(settings.ARTICLE_SEARCH_BACKEND)()
+        elif connection.vendor == 'sqlite':
+            _backend = SQLiteFTSBackend()
+        else:
+            _backend = PythonIndexBackend()
+    return _backend
+
+
+@receiver(setting_changed)
+def reset_search_backend(setting, **kwargs):
+    global _backend
+    if setting.startswith('ARTICLE_SEARCH'):
+        _backend = None
@@ -1,8 +1,19 @@
+from collections import Counter
+
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.urls import reverse
 from rest_framework.exceptions import ValidationError
 from rest_framework import serializers
 
+from core.db import reserve_ids
+from core.mixins import build_query_plan
+from core.pagination import KeysetPagination
+from core.serializers import SparseFieldsetsMixin
+
+from .counters import change_counters
 from .models import Comment, Article, Resource
+from .signals import articles_changed
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -78,8 +89,11 @@ class ResourceOwnerCreateMixin(ResourceOwnerValidateMixin):
         object_model = self._model
         article_key, comment_key = None, None
 
+        if object_model is Article:
+            # Resources are created by `bulk_create` which doesn't update counters
+            validated_data['resource_count'] = len(resources_data or ())
+
         instance = object_model.objects.create(**validated_data)
-        instance.save()
 
         if object_model is Article:
             article_key = instance
@@ -99,6 +113,11 @@ class ResourceOwnerCreateMixin(ResourceOwnerValidateMixin):
                     type=r['type']
                 ) for r in resources_data]
             )
+            # `bulk_create` doesn't send `post_save`
+            articles_changed.send(
+                sender=Resource,
+                article_ids=[instance.pk if article_key else instance.article_id]
+            )
 
         return instance
 
@@ -110,54 +129,78 @@ class ResourceOwnerUpdateMixin(ResourceOwnerValidateMixin):
     Adds custom `update` method with updating nested `resources` objects.
     """
     def update(self, instance, validated_data):
-        resources_data = validated_data.pop('resources')
+        resources_data = validated_data.pop('resources', None)
         # Get current model from metaclass
         object_model = self._model
 
-        # update all fields in instance
-        instance = super().update(instance, validated_data)
+        if object_model is Article:
+            owner_lookup = 'article'
+        elif object_model is Comment:
+            owner_lookup = 'comment'
+        else:
+            raise TypeError("Type of resources owner must be Comment or Article.")
 
-        if resources_data is not None:
-            if object_model is Article:
-                resources_queryset = Resource.objects.filter(
-                    is_deleted=False, article=instance
-                )
-            elif object_model is Comment:
-                resources_queryset = Resource.objects.filter(
-                    is_deleted=False, comment=instance
+        with transaction.atomic():
+            # update all fields in instance
+            instance = super().update(instance, validated_data)
+
+            if resources_data:
+                self.update_resources(
+                    Resource.objects.filter(**{owner_lookup: instance}), resources_data
                 )
-            else:
-                raise TypeError(
-                    "Type of resources owner must be Comment or Article."
+                # `bulk_update` and `update` don't send `post_save`
+                articles_changed.send(
+                    sender=Resource,
+                    article_ids=[instance.pk if object_model is Article else instance.article_id]
                 )
 
-            for r_data in resources_data:
-                # Get resource by given id
-                resource = resources_queryset.get(id=r_data['id'])
-                if resource is None:
-                    raise ValueError("There is not a resource with such id.")
-
-                # If flag 'delete' is True
-                # Deleting an instance
-                if r_data.get('delete', False):
-                    resource.delete()
-                    continue
-
-                # if flag isn't exists or false
-                # Update all fields
-                for key, value in r_data.items():
-                    setattr(resource, key, value)
+        return instance
 
-                resource.save()
+    @staticmethod
+    def update_resources(resources_queryset, resources_data):
+        """
+        Applies changes of resources by a few queries:
+        select, `bulk_update` of changed fields and bulk soft delete.
+        :param resources_queryset: resources of the owner
+        :param resources_data: validated items with `id` and optional `delete` flag
+        """
+        resources = resources_queryset.select_for_update().in_bulk(
+            [r_data['id'] for r_data in resources_data]
+        )
 
-        return instance
+        missing_ids = [r_data['id'] for r_data in resources_data if r_data['id'] not in resources]
+        if missing_ids:
+            raise ValidationError({'resources': [
+                "There is not a resource with id %s." % pk for pk in missing_ids
+            ]})
+
+        deleted_ids, changed, fields = set(), {}, set()
+        for r_data in resources_data:
+            r_data = dict(r_data)
+            pk = r_data.pop('id')
+            if r_data.pop('delete', False):
+                deleted_ids.add(pk)
+                continue
+
+            # Update all given fields
+            resource = resources[pk]
+            for key, value in r_data.items():
+                setattr(resource, key, value)
+            changed[pk] = resource
+            fields.update(r_data)
+
+        changed = [resource for pk, resource in changed.items() if pk not in deleted_ids]
+        if changed and fields:
+            Resource.objects.bulk_update(changed, fields)
+        if deleted_ids:
+            resources_queryset.filter(pk__in=deleted_ids).delete()
 
 
 class CommentBaseSerializer(serializers.ModelSerializer):
     """
     Base comment serializer. Not for use.
     """
-    author = AuthorSerializer()
+    author = AuthorSerializer(read_only=True)
     # Resources field required
 
     _model = Comment
@@ -190,6 +233,122 @@ class CommentCreateRetrieveSerializer(
         return super().validate(attrs)
 
 
+class CommentBatch:
+    """
+    Creates a list of comments with their resources by a few bulk queries.
+
+    Items are validated by `CommentCreateRetrieveSerializer` one by one,
+    valid ones are created even if others are invalid.
+    Without `article` every item refers to its article by `article` slug.
+    """
+    max_size = 1000
+
+    def __init__(self, data, context, article=None):
+        self.data = data
+        self.context = context
+        self.article = article
+
+    def save(self) -> list:
+        """
+        :return: per item results: `{'status': 201, 'comment': {...}}`
+            or `{'status': 400, 'errors': {...}}`
+        """
+        if not isinstance(self.data, list) or not all(isinstance(i, dict) for i in self.data):
+            raise ValidationError({'non_field_errors': ["Expected a list of comments."]})
+        if len(self.data) > self.max_size:
+            raise ValidationError({'non_field_errors': [
+                "Ensure this list has no more than %d comments." % self.max_size
+            ]})
+
+        results, validated = self.validate_items()
+        if not validated:
+            return results
+
+        with transaction.atomic():
+            comments = self.create(validated)
+
+        serializer = CommentCreateRetrieveSerializer(context=self.context)
+        queryset = build_query_plan(serializer, Comment).apply(Comment.objects.all())
+        created = queryset.in_bulk([comment.pk for comment in comments])
+
+        for (index, attrs), comment in zip(validated, comments):
+            results[index] = {
+                'status': 201,
+                'comment': CommentCreateRetrieveSerializer(
+                    created[comment.pk], context=self.context
+                ).data,
+            }
+        return results
+
+    def validate_items(self):
+        """
+        :return: list of results with errors only
+            and list of `(index, validated_data)` of valid items
+        """
+        articles = {}
+        if self.article is None:
+            slugs = [item.get('article') for item in self.data]
+            articles = Article.objects.in_bulk(
+                [slug for slug in slugs if isinstance(slug, str)], field_name='slug'
+            )
+
+        results, validated = [], []
+        for index, item in enumerate(self.data):
+            article = self.article
+            if article is None:
+                slug = item.get('article')
+                if not isinstance(slug, str):
+                    results.append({'status': 400, 'errors': {'article': ["Expected article slug."]}})
+                    continue
+                article = articles.get(slug)
+            if article is None:
+                results.append({'status': 400, 'errors': {'article': ["Article not found."]}})
+                continue
+
+            serializer = CommentCreateRetrieveSerializer(
+                data=item, context=dict(self.context, article=article)
+            )
+            if serializer.is_valid():
+                validated.append((index, serializer.validated_data))
+                results.append(None)
+            else:
+                results.append({'status': 400, 'errors': serializer.errors})
+
+        return results, validated
+
+    @staticmethod
+    def create(validated) -> list:
+        comments = [
+            Comment(article=attrs['article'], author=attrs['author'], text=attrs['text'])
+            for index, attrs in validated
+        ]
+
+        ids = reserve_ids(Comment, len(comments))
+        if ids is None:
+            # Resources need ids of comments
+            for comment in comments:
+                comment.save()
+        else:
+            for comment, pk in zip(comments, ids):
+                comment.pk = pk
+            Comment.objects.bulk_create(comments)
+            # `bulk_create` doesn't send `post_save`
+            change_counters(
+                'comment_count', Counter(comment.article_id for comment in comments)
+            )
+
+        Resource.objects.bulk_create([
+            Resource(comment=comment, url=r['url'], type=r['type'])
+            for comment, (index, attrs) in zip(comments, validated)
+            for r in attrs.get('resources') or []
+        ])
+
+        articles_changed.send(
+            sender=Comment, article_ids=list({comment.article_id for comment in comments})
+        )
+        return comments
+
+
 class CommentUpdateSerializer(ResourceOwnerUpdateMixin, CommentBaseSerializer):
     """
     Comment serializer for updating (`PUT`, `PATCH`) request methods.
@@ -197,7 +356,7 @@ class CommentUpdateSerializer(ResourceOwnerUpdateMixin, CommentBaseSerializer):
     resources = ResourceUpdateSerializer(many=True)
 
 
-class ArticleDetailBaseSerializer(serializers.ModelSerializer):
+class ArticleDetailBaseSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     """
     Base article serializer. Not for direct use.
     """
@@ -217,10 +376,11 @@ class ArticleDetailBaseSerializer(serializers.ModelSerializer):
             'preview_image',
             'author',
             'created_at',
+            'view_count',
             'resources',
             'comments',
         )
-        read_only_fields = ('created_at', 'comments')
+        read_only_fields = ('created_at', 'view_count', 'comments')
 
 
 class ArticleCreateRetrieveSerializer(
@@ -233,6 +393,38 @@ class ArticleCreateRetrieveSerializer(
     comments = CommentCreateRetrieveSerializer(many=True, read_only=True)
 
 
+class ArticleCommentsPreviewSerializer(ArticleCreateRetrieveSerializer):
+    """
+    Article serializer for getting an instance with comments count
+    and the first page of comments instead of all comments.
+
+    Next pages are available via `comments` action of article viewset.
+    """
+    comments = serializers.SerializerMethodField()
+
+    def get_comments(self, instance):
+        comment_serializer = CommentCreateRetrieveSerializer(context=self.context)
+        queryset = build_query_plan(comment_serializer, Comment).apply(
+            instance.comments.all()
+        )
+
+        paginator = KeysetPagination()
+        url = reverse('articles:article-comments', kwargs={'slug': instance.slug})
+        request = self.context.get('request')
+        if request is not None:
+            url = request.build_absolute_uri(url)
+
+        page = paginator.paginate_first_page(queryset, url)
+        comment_serializer = CommentCreateRetrieveSerializer(
+            page, many=True, context=self.context
+        )
+        return {
+            'count': instance.comment_count,
+            'next': paginator.get_next_link(),
+            'results': comment_serializer.data,
+        }
+
+
 class ArticleUpdateSerializer(
     ResourceOwnerUpdateMixin, ArticleDetailBaseSerializer
 ):
@@ -243,7 +435,7 @@ class ArticleUpdateSerializer(
     comments = CommentUpdateSerializer(many=True, read_only=True)
 
 
-class ArticleListSerializer(serializers.ModelSerializer):
+class ArticleListSerializer(SparseFieldsetsMixin, serializers.ModelSerializer):
     class Meta:
         model = Article
         fields = (
@@ -251,5 +443,8 @@ class ArticleListSerializer(serializers.ModelSerializer):
             'description',
             'preview_image',
             'slug',
+            'created_at',
+            'comment_count',
+            'resource_count',
         )
         read_only_fields = fields
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent when rendered representation of articles is changed.
+# Bulk operations which bypass `post_save` must send it themselves.
+# Arguments: `article_ids`
+articles_changed = Signal()
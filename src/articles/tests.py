@@ -1,13 +1,31 @@
 import json
+import os
+import tempfile
+import threading
 from copy import deepcopy
+from io import StringIO
+from unittest import mock, skipUnless
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.management import call_command
+from django.db import connection
 from django.shortcuts import reverse
-from rest_framework.test import APITestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase, APITransactionTestCase
 from rest_framework import status
 
+from .cache import article_cache
+from .export import ArticleExport
+from .importer import ArticleImport
+from .feed import main_page_feed
+from .search import PythonIndexBackend, SQLiteFTSBackend, get_search_backend
 from .serializers import ArticleCreateRetrieveSerializer, AuthorSerializer
-from .models import Article
+from .view_counter import ViewCounter, view_counter
+from .models import Article, Comment, Resource
 from core.utils import slugify_article
 
 
@@ -80,6 +98,12 @@ class ArticleCommentMixin:
         grant_author(self.author)
         self.author.save()
         self.user = UserModel.objects.create_user(**USER)
+        caches[settings.ARTICLE_CACHE_ALIAS].clear()
+        self.addCleanup(view_counter.clear)
+        # Views are written by tests explicitly, not in the middle of counted queries
+        flush_interval = self.settings(ARTICLE_VIEW_FLUSH_INTERVAL=3600)
+        flush_interval.enable()
+        self.addCleanup(flush_interval.disable)
 
     def create_article(self, data=ARTICLE):
         serializer = ArticleCreateRetrieveSerializer(data=data, context={'user': self.author})
@@ -191,6 +215,7 @@ class ArticleTestCase(ArticleCommentMixin, APITestCase):
         # because they're immutable
         response_content.pop('created_at')
         response_content.pop('comments')
+        response_content.pop('view_count')
 
         # And remove deleted objects
         data['resources'] = [
@@ -317,3 +342,934 @@ class CommentsTestCase(ArticleCommentMixin, APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(resp_data['comments']), 1, len(resp_data['comments']))
+
+
+class MainPageTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.url_main_page = reverse('articles:main-page')
+
+        for i in range(5):
+            article = deepcopy(ARTICLE)
+            article['title'] = 'Article %d' % i
+            self.create_article(article)
+
+    def collect_pages(self, url: str, link: str) -> list:
+        """
+        Walks through pages by `link` (`next` or `previous`).
+        :return: list of pages titles.
+        """
+        pages = []
+        while url is not None:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+
+            data = json.loads(response.content)
+            pages.append([a['title'] for a in data['results']])
+            url = data[link]
+
+        return pages
+
+    def test_main_page_cursor_pagination(self):
+        pages = self.collect_pages(self.url_main_page + '?page_size=2', 'next')
+        self.assertEqual(pages, [
+            ['Article 4', 'Article 3'],
+            ['Article 2', 'Article 1'],
+            ['Article 0'],
+        ])
+
+    def test_main_page_previous_pages(self):
+        response = self.client.get(self.url_main_page + '?page_size=2')
+        second_page_url = json.loads(response.content)['next']
+        response = self.client.get(second_page_url)
+        data = json.loads(response.content)
+
+        pages = self.collect_pages(data['previous'], 'previous')
+        self.assertEqual(pages, [['Article 4', 'Article 3']])
+
+    def test_main_page_new_article_does_not_shift_pages(self):
+        response = self.client.get(self.url_main_page + '?page_size=2')
+        next_url = json.loads(response.content)['next']
+
+        article = deepcopy(ARTICLE)
+        article['title'] = 'Article 5'
+        self.create_article(article)
+
+        response = self.client.get(next_url)
+        titles = [a['title'] for a in json.loads(response.content)['results']]
+        self.assertEqual(titles, ['Article 2', 'Article 1'])
+
+    def test_main_page_invalid_cursor(self):
+        response = self.client.get(self.url_main_page + '?cursor=wrong')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ArticleQueriesTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.article = Article.objects.last()
+
+    def add_comments(self, count: int):
+        for i in range(count):
+            comment = Comment.objects.create(
+                article=self.article, author=self.user, text='Comment %d' % i
+            )
+            Resource.objects.create(comment=comment, url='https://test.com', type='URL')
+
+    def count_detail_queries(self) -> int:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url_article_detail)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_article_detail_constant_queries(self):
+        self.add_comments(1)
+        queries = self.count_detail_queries()
+
+        self.add_comments(5)
+        self.assertEqual(self.count_detail_queries(), queries)
+
+    def test_article_detail_deleted_comments_hidden(self):
+        self.add_comments(2)
+        Comment.objects.last().delete()
+
+        response = self.client.get(self.url_article_detail)
+        self.assertEqual(len(json.loads(response.content)['comments']), 1)
+
+    @skipUnless(connection.vendor == 'sqlite', "Planner of other databases depends on table statistics")
+    def test_live_rows_partial_indexes(self):
+        plans = {
+            'article_live_created_idx': Article.objects.order_by('-created_at', '-id')[:20],
+            'comment_live_article_idx': Comment.objects.filter(
+                article=self.article
+            ).order_by('-created_at', '-id')[:20],
+            'resource_live_comment_idx': Resource.objects.filter(comment_id__in=[1, 2]),
+        }
+        for index, queryset in plans.items():
+            self.assertIn(index, queryset.explain())
+
+
+class ArticleCommentsPageTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.article = Article.objects.last()
+        self.url_comments = reverse(
+            'articles:article-comments', kwargs={'slug': self.article.slug}
+        )
+
+        for i in range(3):
+            Comment.objects.create(
+                article=self.article, author=self.user, text='Comment %d' % i
+            )
+
+    def test_comments_pages(self):
+        response = self.client.get(self.url_comments + '?page_size=2')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = json.loads(response.content)
+        self.assertEqual([c['text'] for c in data['results']], ['Comment 2', 'Comment 1'])
+
+        data = json.loads(self.client.get(data['next']).content)
+        self.assertEqual([c['text'] for c in data['results']], ['Comment 0'])
+        self.assertIsNone(data['next'])
+
+    def test_comments_of_missing_article(self):
+        url = reverse('articles:article-comments', kwargs={'slug': 'missing'})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_article_comments_preview(self):
+        response = self.client.get(self.url_article_detail + '?comments=preview')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        comments = json.loads(response.content)['comments']
+        self.assertEqual(comments['count'], 3)
+        self.assertEqual(len(comments['results']), 3)
+        self.assertIsNone(comments['next'])
+
+
+class ArticleCacheTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.article = Article.objects.last()
+
+    def get_cache_status(self) -> str:
+        response = self.client.get(self.url_article_detail)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response['X-Cache']
+
+    def test_article_cache_hit(self):
+        stats = article_cache.stats()
+        self.assertEqual(self.get_cache_status(), 'MISS')
+        self.assertEqual(self.get_cache_status(), 'HIT')
+
+        new_stats = article_cache.stats()
+        self.assertEqual(new_stats['hits'] - stats['hits'], 1)
+        self.assertEqual(new_stats['misses'] - stats['misses'], 1)
+
+    def test_article_cache_invalidated_by_comment(self):
+        self.get_cache_status()
+        comment = Comment.objects.create(article=self.article, author=self.user, text='text')
+        self.assertEqual(self.get_cache_status(), 'MISS')
+
+        self.get_cache_status()
+        Resource.objects.create(comment=comment, url='https://test.com', type='URL')
+        self.assertEqual(self.get_cache_status(), 'MISS')
+
+    def test_article_cache_invalidated_by_username(self):
+        Comment.objects.create(article=self.article, author=self.user, text='text')
+        self.get_cache_status()
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=['last_login'])
+        self.assertEqual(self.get_cache_status(), 'HIT')
+
+        self.user.username = 'renamed'
+        self.user.save()
+        response = self.client.get(self.url_article_detail)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        comments = json.loads(response.content)['comments']
+        self.assertEqual(comments[-1]['author']['username'], 'renamed')
+
+    def test_article_cache_invalidated_by_delete(self):
+        self.get_cache_status()
+        self.article.delete()
+
+        response = self.client.get(self.url_article_detail)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalGetTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.article = Article.objects.last()
+        self.url_main_page = reverse('articles:main-page')
+
+    def test_article_not_modified(self):
+        response = self.client.get(self.url_article_detail)
+        etag = response['ETag']
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url_article_detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(context.captured_queries), 1)
+
+    def test_article_modified_by_comment(self):
+        etag = self.client.get(self.url_article_detail)['ETag']
+        Comment.objects.create(article=self.article, author=self.user, text='text')
+
+        response = self.client.get(self.url_article_detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_article_modified_by_comment_author(self):
+        Comment.objects.create(article=self.article, author=self.user, text='text')
+        etag = self.client.get(self.url_article_detail)['ETag']
+        self.user.username = 'renamed'
+        self.user.save()
+
+        response = self.client.get(self.url_article_detail, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_article_modified_by_comment_resources(self):
+        comment = Comment.objects.create(article=self.article, author=self.user, text='text')
+        resource = Resource.objects.create(comment=comment, url='https://test.com', type='URL')
+        etags = [self.client.get(self.url_article_detail)['ETag']]
+
+        Resource.objects.filter(pk=resource.pk).delete()
+        etags.append(self.client.get(self.url_article_detail)['ETag'])
+        Resource.include_deleted.filter(pk=resource.pk).restore()
+        etags.append(self.client.get(self.url_article_detail)['ETag'])
+        self.assertNotEqual(etags[0], etags[1])
+        self.assertNotEqual(etags[1], etags[2])
+
+    def test_main_page_not_modified_since(self):
+        last_modified = self.client.get(self.url_main_page)['Last-Modified']
+
+        response = self.client.get(self.url_main_page, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class MainPageFeedTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.url_main_page = reverse('articles:main-page')
+        self.create_article()
+
+    def get_titles(self, url: str) -> list:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [a['title'] for a in json.loads(response.content)['results']]
+
+    def test_main_page_feed_single_lookup(self):
+        self.get_titles(self.url_main_page)
+
+        # Only validators are computed by database
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_titles(self.url_main_page), [ARTICLE['title']])
+
+    def test_main_page_feed_updated_on_write(self):
+        self.get_titles(self.url_main_page)
+
+        article = deepcopy(ARTICLE)
+        article['title'] = 'New title'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_article(article)
+        self.assertEqual(self.get_titles(self.url_main_page), ['New title', ARTICLE['title']])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.get(title='New title').delete()
+        self.assertEqual(self.get_titles(self.url_main_page), [ARTICLE['title']])
+
+    def test_main_page_feed_update_doesnt_wait_for_lock(self):
+        self.client.get(self.url_main_page)
+        self.assertIsNotNone(main_page_feed.cache.get(main_page_feed.key))
+
+        # Other worker rebuilds the feed
+        self.assertTrue(main_page_feed._acquire(wait=0))
+        with mock.patch('articles.feed.time.sleep') as sleep:
+            main_page_feed.update([Article.objects.last().pk])
+        sleep.assert_not_called()
+        self.assertIsNone(main_page_feed.cache.get(main_page_feed.key))
+
+        # Its feed may miss the change
+        main_page_feed._store(main_page_feed.build())
+        main_page_feed._release()
+        self.assertIsNone(main_page_feed.cache.get(main_page_feed.key))
+
+    def test_main_page_feed_pages_beyond_feed(self):
+        for i in range(3):
+            article = deepcopy(ARTICLE)
+            article['title'] = 'Article %d' % i
+            self.create_article(article)
+
+        with self.settings(MAIN_PAGE_FEED_SIZE=2):
+            main_page_feed.clear()
+            response = json.loads(self.client.get(self.url_main_page + '?page_size=2').content)
+            self.assertEqual(self.get_titles(response['next']), ['Article 0', ARTICLE['title']])
+
+
+class SearchTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.url_search = reverse('articles:search')
+
+        articles = (
+            ('Python news', 'Nothing interesting', 'Django release'),
+            ('Weather', 'Rain in python valley', 'Cold'),
+            ('Sport', 'Football', 'Python is a snake and a team name'),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            for title, description, text in articles:
+                article = deepcopy(ARTICLE)
+                article.update(title=title, description=description, text=text)
+                self.create_article(article)
+
+    def search(self, url: str) -> dict:
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return json.loads(response.content)
+
+    def check_search(self):
+        data = self.search(self.url_search + '?q=python&page_size=2')
+        self.assertEqual([a['title'] for a in data['results']], ['Python news', 'Weather'])
+
+        data = self.search(data['next'])
+        self.assertEqual([a['title'] for a in data['results']], ['Sport'])
+        self.assertIsNone(data['next'])
+
+        data = self.search(data['previous'])
+        self.assertEqual([a['title'] for a in data['results']], ['Python news', 'Weather'])
+
+    def test_search_ranked_pages(self):
+        self.check_search()
+
+    def test_search_deleted_article(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.get(title='Weather').delete()
+
+        data = self.search(self.url_search + '?q=python')
+        self.assertEqual([a['title'] for a in data['results']], ['Python news', 'Sport'])
+
+    def test_search_transliterated(self):
+        article = deepcopy(ARTICLE)
+        article.update(title='Привет мир', description='Новости', text='Текст')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_article(article)
+
+        for query in ('привет', 'privet', 'Мир'):
+            data = self.search(self.url_search + '?q=' + query)
+            self.assertEqual([a['title'] for a in data['results']], ['Привет мир'], query)
+
+    def test_search_backend_by_vendor(self):
+        with self.settings(ARTICLE_SEARCH_BACKEND=None):
+            self.assertIsInstance(get_search_backend(), SQLiteFTSBackend)
+            with mock.patch.object(connection, 'vendor', 'postgresql'):
+                with self.settings(ARTICLE_SEARCH_BACKEND=None):
+                    self.assertIsInstance(get_search_backend(), PythonIndexBackend)
+                with self.assertRaises(ImproperlyConfigured):
+                    SQLiteFTSBackend()
+
+    def test_search_empty_query(self):
+        response = self.client.get(self.url_search + '?q=+')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_search_python_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index')
+            with self.settings(
+                ARTICLE_SEARCH_BACKEND='articles.search.PythonIndexBackend',
+                ARTICLE_SEARCH_INDEX_PATH=path
+            ):
+                get_search_backend().index(Article.objects.all())
+                self.check_search()
+
+    def check_rebuild(self, backend):
+        # Failed rebuild keeps the old index
+        with mock.patch.object(type(backend), 'index', side_effect=[None, ValueError]):
+            with self.assertRaises(ValueError):
+                call_command('rebuild_search_index', chunk_size=1, stdout=StringIO())
+        self.check_search()
+
+        backend.remove(Article.objects.values_list('pk', flat=True))
+        output = StringIO()
+        call_command('rebuild_search_index', chunk_size=2, stdout=output)
+        self.assertIn('Indexed 3 articles.', output.getvalue())
+        self.check_search()
+
+    def test_rebuild_search_index(self):
+        self.check_rebuild(get_search_backend())
+
+    def test_rebuild_python_index(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'index')
+            with self.settings(
+                ARTICLE_SEARCH_BACKEND='articles.search.PythonIndexBackend',
+                ARTICLE_SEARCH_INDEX_PATH=path
+            ):
+                backend = get_search_backend()
+                backend.index(Article.objects.all())
+                self.check_rebuild(backend)
+                # Temporary files are moved or removed
+                self.assertTrue(all(name.startswith('index') for name in os.listdir(directory)))
+
+
+class SparseFieldsetsTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.article = Article.objects.last()
+        Comment.objects.create(article=self.article, author=self.user, text='text')
+
+    def get(self, url: str):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return json.loads(response.content), context.captured_queries
+
+    def test_article_fields(self):
+        data, queries = self.get(self.url_article_detail + '?fields=title,created_at')
+        self.assertEqual(set(data), {'title', 'created_at'})
+
+        # Validators and article itself without text and relations
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"text"', queries[-1]['sql'])
+
+    def test_article_expand(self):
+        data, queries = self.get(self.url_article_detail + '?expand=resources')
+        self.assertIn('text', data)
+        self.assertIn('resources', data)
+        self.assertNotIn('comments', data)
+        self.assertNotIn('author', data)
+
+    def test_main_page_fields(self):
+        url = reverse('articles:main-page') + '?fields=title,slug,created_at'
+        for i in range(2):
+            # Built and cached feed
+            data, queries = self.get(url)
+            self.assertEqual(set(data['results'][0]), {'title', 'slug', 'created_at'})
+
+
+class ValuesSerializerTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        for i in range(3):
+            article = deepcopy(ARTICLE)
+            article['title'] = 'Article %d' % i
+            self.create_article(article)
+
+        self.article = Article.objects.get(title='Article 0')
+        self.url_article_detail = reverse('articles:article-detail', kwargs={'slug': self.article.slug})
+        for i in range(3):
+            comment = Comment.objects.create(article=self.article, author=self.user, text='Comment %d' % i)
+            Resource.objects.create(comment=comment, url='https://test.com/%d' % i, type='IMG')
+
+    def get_both(self, url: str):
+        """
+        Returns contents of responses rendered by serializer and from values.
+        """
+        caches[settings.ARTICLE_CACHE_ALIAS].clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        caches[settings.ARTICLE_CACHE_ALIAS].clear()
+        with self.settings(FAST_READ_SERIALIZATION=True, MAIN_PAGE_FEED_SIZE=0):
+            fast_response = self.client.get(url)
+        return response.content, fast_response.content
+
+    def test_values_serializer_article_detail(self):
+        content, fast_content = self.get_both(self.url_article_detail)
+        self.assertEqual(content, fast_content)
+
+    def test_values_serializer_sparse_fields(self):
+        content, fast_content = self.get_both(self.url_article_detail + '?expand=comments')
+        self.assertEqual(content, fast_content)
+
+    def test_values_serializer_main_page(self):
+        content, fast_content = self.get_both(reverse('articles:main-page') + '?page_size=2')
+        self.assertEqual(content, fast_content)
+
+
+class ExportTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.url = reverse('articles:export')
+        for i in range(3):
+            article = deepcopy(ARTICLE)
+            article['title'] = 'Article %d' % i
+            self.create_article(article)
+
+        self.article = Article.objects.get(title='Article 0')
+        comment = Comment.objects.create(article=self.article, author=self.user, text='Comment')
+        Resource.objects.create(comment=comment, url='https://test.com', type='IMG')
+        self.client.force_authenticate(self.author)
+
+    def export(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return b''.join(response.streaming_content).decode()
+
+    def test_export_jsonl(self):
+        rows = [json.loads(line) for line in self.export().splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Article 0', 'Article 1', 'Article 2'])
+        self.assertEqual(len(rows[0]['resources']), 3)
+        self.assertEqual(rows[0]['comments'][0]['text'], 'Comment')
+        self.assertEqual(rows[0]['comments'][0]['resources'][0]['url'], 'https://test.com')
+
+    def test_export_csv(self):
+        lines = self.export('?output=csv').splitlines()
+        self.assertTrue(lines[0].startswith('record,id,article_id'))
+        records = [line.split(',')[0] for line in lines[1:]]
+        self.assertEqual(records.count('article'), 3)
+        self.assertEqual(records.count('comment'), 1)
+        self.assertEqual(records.count('resource'), 10)
+
+    def test_export_updated_range(self):
+        Article.objects.filter(pk=self.article.pk).update(updated_at='2000-01-01T00:00Z')
+        rows = self.export('?updated_before=2001-01-01T00:00Z').splitlines()
+        self.assertEqual([json.loads(row)['id'] for row in rows], [self.article.pk])
+
+    def test_export_batched_queries(self):
+        export = ArticleExport(chunk_size=2)
+        with CaptureQueriesContext(connection) as context:
+            list(export)
+        # Articles, then comments and resources of two chunks
+        self.assertEqual(len(context.captured_queries), 5)
+
+    def test_export_permission_denied(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class ImportTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        comment = deepcopy(COMMENT)
+        comment['author_id'] = self.user.pk
+        self.article = dict(deepcopy(ARTICLE), author_id=self.author.pk, comments=[comment])
+
+    def test_import_articles(self):
+        lines = [json.dumps(dict(self.article, title='Article %d' % i)) for i in range(3)]
+        counts = ArticleImport(chunk_size=2).run(lines)
+        self.assertEqual(counts, {'articles': 3, 'comments': 3, 'resources': 15})
+
+        article = Article.objects.get(title='Article 1')
+        self.assertEqual(article.slug, slugify_article(article.pk, 'Article 1'))
+        self.assertEqual(article.resources.count(), 3)
+        self.assertEqual(article.comments.get().resources.count(), 2)
+
+    def test_import_exported_articles(self):
+        self.create_article()
+        self.client.force_authenticate(self.author)
+        response = self.client.get(reverse('articles:export'))
+        lines = b''.join(response.streaming_content).decode().splitlines()
+
+        ArticleImport().run(lines)
+        self.assertEqual(Article.objects.filter(title=ARTICLE['title']).count(), 2)
+
+    def test_import_invalid_line(self):
+        lines = [json.dumps(self.article), json.dumps(dict(self.article, preview_image='image'))]
+        with self.assertRaisesMessage(ValidationError, 'Line 2: preview_image'):
+            ArticleImport(chunk_size=1).run(lines)
+        self.assertEqual(Article.objects.count(), 1)
+
+
+class ArticleSlugTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+
+    def test_article_slug_follows_title(self):
+        self.create_article()
+        Article.objects.create(title='Next', author=self.author)
+
+        article = Article.objects.get(title=ARTICLE['title'])
+        article.text = 'New text'
+        article.save(update_fields=['text'])
+        self.assertEqual(article.slug, slugify_article(article.pk, ARTICLE['title']))
+
+        article.title = 'New title'
+        article.save(update_fields=['title'])
+        article.refresh_from_db()
+        self.assertEqual(article.slug, slugify_article(article.pk, 'New title'))
+
+    def test_article_bulk_create_slugs(self):
+        articles = [Article(title='Article %d' % i, author=self.author) for i in range(3)]
+        self.assertTrue(Article.prepare_bulk_create(articles))
+        Article.objects.bulk_create(articles)
+        # Ids after reserved ones
+        latest = Article.objects.create(title='Latest', author=self.author)
+
+        for article in Article.objects.exclude(pk=latest.pk):
+            self.assertEqual(article.slug, slugify_article(article.pk, article.title))
+        self.assertGreater(latest.pk, max(article.pk for article in articles))
+
+
+class ArticleSlugTransactionTestCase(ArticleCommentMixin, APITransactionTestCase):
+    def setUp(self) -> None:
+        super().set_up()
+
+    def test_article_created_by_single_write(self):
+        queries = []
+
+        def log_query(execute, sql, params, many, context):
+            queries.append((sql, connection.in_atomic_block, commit.call_count))
+            return execute(sql, params, many, context)
+
+        with mock.patch.object(connection, 'commit', wraps=connection.commit) as commit, \
+                connection.execute_wrapper(log_query):
+            self.create_article()
+
+        writes = [
+            (sql.split(' SET ')[0].split(' (')[0], in_atomic_block, commits)
+            for sql, in_atomic_block, commits in queries
+            if sql.startswith(('INSERT INTO "articles_article"', 'UPDATE "articles_article"'))
+        ]
+        self.assertEqual(writes, [('INSERT INTO "articles_article"', True, 0)])
+        if connection.vendor == 'sqlite':
+            # Id is reserved in the transaction of the insert
+            reservations = [
+                (in_atomic_block, commits) for sql, in_atomic_block, commits in queries
+                if sql.startswith('UPDATE sqlite_sequence')
+            ]
+            self.assertEqual(reservations, [(True, 0)])
+        self.assertGreaterEqual(commit.call_count, 1)
+        article = Article.objects.get()
+        self.assertEqual(article.slug, slugify_article(article.pk, ARTICLE['title']))
+
+
+class ResourceUpdateTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.client.force_authenticate(self.author)
+        self.create_article()
+        self.article = Article.objects.get()
+        Resource.objects.bulk_create([
+            Resource(article=self.article, url='https://test.com/%d' % i, type='IMG')
+            for i in range(20)
+        ])
+
+    def patch(self, resources):
+        return self.client.patch(
+            path=self.url_article_detail,
+            data=json.dumps({'resources': resources}),
+            content_type=APPLICATION_JSON
+        )
+
+    def test_resources_batch_update(self):
+        resource_ids = list(self.article.resources.values_list('pk', flat=True))
+        resources = [{'id': pk, 'url': 'https://new.com/%d' % pk} for pk in resource_ids[:10]]
+        resources += [{'id': pk, 'delete': True} for pk in resource_ids[10:]]
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.patch(resources)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        resource_writes = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('UPDATE "articles_resource"')
+        ]
+        self.assertEqual(len(resource_writes), 2)
+        self.assertEqual(len(response.data['resources']), 10)
+        self.assertTrue(all(r['url'].startswith('https://new.com/') for r in response.data['resources']))
+
+    def test_resources_missing_ids(self):
+        resource_id = self.article.resources.values_list('pk', flat=True)[0]
+        response = self.patch([
+            {'id': resource_id, 'delete': True},
+            {'id': 1000, 'url': 'https://new.com/'},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'resources': ["There is not a resource with id 1000."]})
+        # Nothing is changed
+        self.assertEqual(self.article.resources.count(), 23)
+
+
+class CommentBatchTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        for i in range(2):
+            article = deepcopy(ARTICLE)
+            article['title'] = 'Article %d' % i
+            self.create_article(article)
+
+        self.articles = list(Article.objects.order_by('pk'))
+        self.client.force_authenticate(self.user)
+
+    def post(self, url, comments):
+        return self.client.post(url, data=json.dumps(comments), content_type=APPLICATION_JSON)
+
+    def test_add_comments(self):
+        url = reverse('articles:article-add-comments', kwargs={'slug': self.articles[0].slug})
+        response = self.post(url, [dict(COMMENT, text='Comment %d' % i) for i in range(5)])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual([r['comment']['text'] for r in response.data], ['Comment %d' % i for i in range(5)])
+        self.assertEqual(
+            [r['url'] for r in response.data[0]['comment']['resources']],
+            [r['url'] for r in COMMENT['resources']]
+        )
+        self.assertEqual(self.articles[0].comments.count(), 5)
+        self.assertEqual(Resource.objects.filter(comment__article=self.articles[0]).count(), 10)
+
+    def test_add_comments_many_articles(self):
+        url = reverse('articles:article-add-comments-batch')
+        comments = [dict(COMMENT, article=article.slug) for article in self.articles]
+        comments += [dict(COMMENT, article='missing'), dict(COMMENT, article=self.articles[0].slug, text='')]
+
+        response = self.post(url, comments)
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r['status'] for r in response.data], [201, 201, 400, 400])
+        self.assertIn('article', response.data[2]['errors'])
+        self.assertIn('text', response.data[3]['errors'])
+        for article in self.articles:
+            self.assertEqual(article.comments.count(), 1)
+
+    def test_add_comments_invalid_article(self):
+        url = reverse('articles:article-add-comments-batch')
+        comments = [dict(COMMENT, article=article) for article in ([], {}, None, 1)]
+        comments.append(dict(COMMENT, article=self.articles[0].slug))
+
+        response = self.post(url, comments)
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([r['status'] for r in response.data], [400] * 4 + [201])
+        self.assertEqual(response.data[0]['errors'], {'article': ["Expected article slug."]})
+
+    def test_add_comments_invalid_body(self):
+        url = reverse('articles:article-add-comments-batch')
+        response = self.post(url, COMMENT)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ArticleCountersTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.article = Article.objects.get()
+
+    def get_counters(self):
+        self.article.refresh_from_db()
+        return self.article.comment_count, self.article.resource_count
+
+    def test_counters_on_create_and_delete(self):
+        self.assertEqual(self.get_counters(), (0, 3))
+
+        comments = [
+            Comment.objects.create(article=self.article, author=self.user, text='Comment %d' % i)
+            for i in range(3)
+        ]
+        self.assertEqual(self.get_counters(), (3, 3))
+
+        comments[0].delete()
+        self.article.resources.filter(type='IMG').delete()
+        self.assertEqual(self.get_counters(), (2, 2))
+
+        Comment.include_deleted.all().restore()
+        self.assertEqual(self.get_counters(), (3, 2))
+
+    def test_counters_keep_updated_at(self):
+        url = reverse('articles:main-page')
+        etag = self.client.get(url)['ETag']
+        updated_at = self.article.updated_at
+
+        comment = Comment.objects.create(article=self.article, author=self.user, text='Comment')
+        comment.delete()
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.updated_at, updated_at)
+        self.assertGreater(self.article.activity_at, updated_at)
+
+        # New counters are seen by conditional requests
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_counters_on_main_page(self):
+        url = reverse('articles:main-page')
+        self.client.get(url)
+
+        self.client.force_authenticate(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse('articles:article-add-comments', kwargs={'slug': self.article.slug}),
+                data=json.dumps([COMMENT, COMMENT]),
+                content_type=APPLICATION_JSON
+            )
+
+        article = self.client.get(url).data['results'][0]
+        self.assertEqual((article['comment_count'], article['resource_count']), (2, 3))
+
+    def test_reconcile_counters(self):
+        Article.objects.update(comment_count=5, resource_count=0)
+        output = StringIO()
+        call_command('reconcile_counters', stdout=output)
+
+        self.assertIn('Fixed 1 articles.', output.getvalue())
+        self.assertEqual(self.get_counters(), (0, 3))
+
+
+class ViewCounterTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.create_article({**ARTICLE, 'title': 'Second article'})
+        self.articles = list(Article.objects.order_by('pk'))
+
+    def test_views_are_written_behind(self):
+        for article, views in zip(self.articles, (3, 1)):
+            url = reverse('articles:article-detail', kwargs={'slug': article.slug})
+            for _ in range(views):
+                self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        self.assertEqual(view_counter.pending(), 4)
+        self.assertEqual(Article.objects.get(pk=self.articles[0].pk).view_count, 0)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(view_counter.flush(), 4)
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(
+            list(Article.objects.order_by('pk').values_list('view_count', flat=True)), [3, 1]
+        )
+
+        view_counter.record(self.articles[1].slug)
+        view_counter.flush()
+        self.assertEqual(Article.objects.get(pk=self.articles[1].pk).view_count, 2)
+
+    def test_views_arent_cached(self):
+        url = reverse('articles:article-detail', kwargs={'slug': self.articles[0].slug})
+        response = self.client.get(url)
+        self.assertEqual(json.loads(response.content)['view_count'], 0)
+        view_counter.flush()
+
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(json.loads(response.content)['view_count'], 1)
+        view_counter.flush()
+
+        # Written views change the ETag
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['view_count'], 2)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_missing_article_isnt_counted(self):
+        url = reverse('articles:article-detail', kwargs={'slug': 'missing-article'})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(view_counter.pending(), 0)
+
+    def test_views_are_flushed_in_background(self):
+        counter = ViewCounter()
+        flushed = threading.Event()
+        with self.settings(ARTICLE_VIEW_FLUSH_INTERVAL=0.01), \
+                mock.patch.object(counter, 'flush', side_effect=flushed.set):
+            counter.record(self.articles[0].slug)
+            self.assertTrue(flushed.wait(5))
+
+        counter.stop()
+        self.assertEqual(counter.pending(), 0)
+        self.assertEqual(Article.objects.get(pk=self.articles[0].pk).view_count, 1)
+
+
+class AsyncViewsTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        self.create_article()
+        self.slug = Article.objects.get().slug
+        self.url_async_detail = reverse('articles-async:article-detail', kwargs={'slug': self.slug})
+        self.url_async_main_page = reverse('articles-async:main-page')
+
+    def assertSameContent(self, url, async_url):
+        response = self.client.get(url)
+        async_response = self.client.get(async_url)
+        self.assertEqual(async_response.status_code, response.status_code)
+        # Links of async pages stay under the async prefix
+        self.assertEqual(
+            json.loads(async_response.content.replace(b'/api/async/', b'/api/')),
+            json.loads(response.content)
+        )
+        return async_response
+
+    def test_async_article_detail(self):
+        url = reverse('articles:article-detail', kwargs={'slug': self.slug})
+        self.assertSameContent(url, self.url_async_detail)
+
+        response = self.client.get(self.url_async_detail)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        response = self.client.get(self.url_async_detail, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        view_counter.flush()
+        self.assertEqual(Article.objects.get().view_count, 4)
+
+    def test_async_article_detail_passes_other_requests(self):
+        url = reverse('articles:article-detail', kwargs={'slug': self.slug})
+        self.assertSameContent(url + '?comments=preview', self.url_async_detail + '?comments=preview')
+
+        response = self.client.get(
+            reverse('articles-async:article-detail', kwargs={'slug': '100-missing'})
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertIn('detail', json.loads(response.content))
+
+    def test_async_main_page(self):
+        for i in range(3):
+            self.create_article({**ARTICLE, 'title': 'Article %d' % i})
+        url = reverse('articles:main-page')
+        self.assertSameContent(url, self.url_async_main_page)
+
+        response = self.client.get(self.url_async_main_page)
+        response = self.client.get(self.url_async_main_page, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Pages the feed doesn't cover
+        with self.settings(MAIN_PAGE_FEED_SIZE=2):
+            main_page_feed.clear()
+            next_url = json.loads(self.client.get(self.url_async_main_page + '?page_size=2').content)['next']
+            response = self.assertSameContent(next_url.replace('/api/async/', '/api/'), next_url)
+            self.assertEqual(
+                [article['title'] for article in json.loads(response.content)['results']],
+                ['Article 0', ARTICLE['title']]
+            )
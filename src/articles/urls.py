@@ -1,9 +1,13 @@
-from django.urls import path
+from django.urls import path, re_path
 from rest_framework.routers import SimpleRouter
 
 from .views import (
     ArticleViewSet,
-    MainPageAPIView
+    AsyncArticleDetailView,
+    AsyncMainPageView,
+    ExportAPIView,
+    MainPageAPIView,
+    SearchAPIView,
 )
 
 
@@ -14,5 +18,13 @@ router.register('article', ArticleViewSet, basename='article')
 
 
 urlpatterns = router.urls + [
-    path('main/', MainPageAPIView.as_view(), name='main-page')
+    path('main/', MainPageAPIView.as_view(), name='main-page'),
+    path('search/', SearchAPIView.as_view(), name='search'),
+    path('export/', ExportAPIView.as_view(), name='export'),
+]
+
+# Async versions of read views, see `news_blog.urls`
+async_urlpatterns = [
+    re_path(r'^article/(?P<slug>[^/.]+)/$', AsyncArticleDetailView.as_view(), name='article-detail'),
+    path('main/', AsyncMainPageView.as_view(), name='main-page'),
 ]
@@ -1,7 +1,12 @@
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.viewsets import GenericViewSet
-from rest_framework.generics import ListAPIView
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import GenericAPIView, ListAPIView
+from rest_framework.views import APIView
 from rest_framework.decorators import action
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.mixins import (
@@ -11,17 +16,37 @@ from rest_framework.mixins import (
     DestroyModelMixin
 )
 
+from core.mixins import (
+    ConditionalGetMixin,
+    QueryOptimizerMixin,
+    ValuesReadMixin,
+    build_query_plan,
+)
+from core.pagination import KeysetPagination
+from core.routers import primary_reads, replica_reads
+from core.views import AsyncReadView
+
+from .cache import article_cache
+from .export import ArticleExport, ExportFilterSerializer
+from .feed import main_page_feed
 from .permissions import IsRedactorOrReadOnly
-from .models import Article
+from .search import get_search_backend, tokenize
+from .models import Article, Comment, Resource
 from .serializers import (
     ArticleCreateRetrieveSerializer,
+    ArticleCommentsPreviewSerializer,
     ArticleUpdateSerializer,
     ArticleListSerializer,
+    CommentBatch,
     CommentCreateRetrieveSerializer,
 )
+from .view_counter import view_counter
 
 
 class ArticleViewSet(
+    ConditionalGetMixin,
+    QueryOptimizerMixin,
+    ValuesReadMixin,
     CreateModelMixin,
     UpdateModelMixin,
     RetrieveModelMixin,
@@ -32,6 +57,116 @@ class ArticleViewSet(
     serializer_class = ArticleCreateRetrieveSerializer
     lookup_field = 'slug'
     permission_classes = (IsRedactorOrReadOnly,)
+    pagination_class = KeysetPagination
+    read_from_replica = True
+    # Written views of the article, read with its validators
+    view_count = None
+
+    def get_serializer_class(self):
+        # `?comments=preview` replaces the full list of comments
+        # with its count and the first page
+        if self.action == 'retrieve' and \
+                self.request.query_params.get('comments') == 'preview':
+            return ArticleCommentsPreviewSerializer
+
+        return super().get_serializer_class()
+
+    @staticmethod
+    def get_state_queryset(slug):
+        # Soft deleted comments are included, they change updated_at on delete.
+        # Counters of the article change its `activity_at`.
+        # Resources of comments have no `updated_at` and don't change
+        # their comment, so their deletes and restores are seen by
+        # the latest `deleted_at` and the number of live ones
+        comment_resources = Resource.include_deleted.filter(
+            comment__article=OuterRef('pk')
+        ).order_by().values('comment__article')
+        return Article.objects.filter(slug=slug).annotate(
+            comments_updated_at=Max('comments__updated_at'),
+            comment_authors_updated_at=Max('comments__author__updated_at'),
+            comment_resources_deleted_at=Subquery(
+                comment_resources.annotate(last=Max('deleted_at')).values('last')
+            ),
+            comment_resource_count=Subquery(
+                comment_resources.annotate(
+                    count=Count('pk', filter=Q(is_deleted=False))
+                ).values('count')
+            ),
+        ).values_list(
+            'pk', 'updated_at', 'activity_at', 'author__updated_at', 'comments_updated_at',
+            'comment_authors_updated_at', 'comment_resources_deleted_at',
+            'comment_resource_count', 'view_count'
+        )
+
+    @staticmethod
+    def get_last_modified(state):
+        # The last items are numbers of resources and views
+        return max(filter(None, state[1:-2]))
+
+    @staticmethod
+    def add_view_count(content: bytes, view_count: int) -> bytes:
+        """
+        Adds views to rendered JSON object of the article.
+        Views are written behind, so they aren't kept in cached content.
+        """
+        return b'%s,"view_count":%d}' % (content.rstrip()[:-1], view_count)
+
+    def get_validators(self, request, *args, **kwargs):
+        state = self.get_state_queryset(kwargs[self.lookup_url_kwarg or self.lookup_field]).first()
+        if state is None:
+            return None, None
+
+        self.view_count = state[-1]
+        return state, self.get_last_modified(state)
+
+    def retrieve(self, request, *args, **kwargs):
+        response = self.get_retrieve_response(request, *args, **kwargs)
+        if request.method == 'GET':
+            # Missing articles raise 404 before
+            view_counter.record(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        return response
+
+    def get_retrieve_response(self, request, *args, **kwargs):
+        response = self.get_conditional_response(request, *args, **kwargs)
+        if response is not None:
+            return response
+
+        # Only default JSON representation is cached
+        if request.query_params or request.accepted_renderer.format != 'json':
+            return Response(self.get_object_data())
+
+        slug = kwargs[self.lookup_url_kwarg or self.lookup_field]
+        content = article_cache.get(slug)
+        cache_status = 'HIT'
+
+        if content is None or self.view_count is None:
+            cache_status = 'MISS'
+            # Content is cached for all clients, so it's rendered with its
+            # validators from the default database, replicas may lag behind
+            from_replica = replica_reads.get()
+            with primary_reads():
+                if from_replica:
+                    self.set_validators(request, *args, **kwargs)
+                data = self.get_object_data()
+                self.view_count = data.pop('view_count')
+                content = request.accepted_renderer.render(
+                    data,
+                    request.accepted_media_type,
+                    self.get_renderer_context()
+                )
+            article_cache.set(slug, content)
+
+        content = self.add_view_count(content, self.view_count)
+        response = HttpResponse(content, content_type=request.accepted_renderer.media_type)
+        response['X-Cache'] = cache_status
+        return response
+
+    def get_object_data(self):
+        values_serializer = self.get_values_serializer()
+        if values_serializer is not None:
+            return self.get_object_values(values_serializer)
+
+        return self.get_serializer(self.get_object()).data
 
     def update(self, request, *args, **kwargs):
         self.serializer_class = ArticleUpdateSerializer
@@ -56,8 +191,273 @@ class ArticleViewSet(
 
         return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        detail=True,
+        methods=['POST'],
+        url_path='add_comments',
+        permission_classes=(IsAuthenticated,),
+        serializer_class=CommentCreateRetrieveSerializer
+    )
+    def add_comments(self, request, slug=None):
+        return self.create_comments(request, self.get_object())
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='add_comments',
+        permission_classes=(IsAuthenticated,),
+        serializer_class=CommentCreateRetrieveSerializer
+    )
+    def add_comments_batch(self, request):
+        return self.create_comments(request)
+
+    def create_comments(self, request, article=None):
+        """
+        Creates a list of comments of the article,
+        without it every item refers to its article by `article` slug.
+        """
+        results = CommentBatch(request.data, {'request': request}, article).save()
+
+        created = sum(1 for result in results if result['status'] == status.HTTP_201_CREATED)
+        if created == len(results):
+            response_status = status.HTTP_201_CREATED
+        elif created:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response(results, response_status)
+
+    @action(
+        detail=True,
+        methods=['GET'],
+        permission_classes=(AllowAny,),
+        serializer_class=CommentCreateRetrieveSerializer,
+        pagination_class=KeysetPagination
+    )
+    def comments(self, request, slug=None):
+        article = self.get_object()
+        queryset = self.optimize_queryset(Comment.objects.filter(article=article))
 
-class MainPageAPIView(ListAPIView):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class MainPageAPIView(
+    ConditionalGetMixin,
+    QueryOptimizerMixin,
+    ValuesReadMixin,
+    ListAPIView
+):
     queryset = Article.objects.all()
     serializer_class = ArticleListSerializer
     permission_classes = (AllowAny,)
+    pagination_class = KeysetPagination
+    read_from_replica = True
+
+    @staticmethod
+    def get_state_aggregates():
+        # Soft deleting updates `updated_at` too,
+        # new comments and resources update `activity_at`
+        return {'updated_at': Max('updated_at'), 'activity_at': Max('activity_at')}
+
+    @staticmethod
+    def get_state(aggregates):
+        state = (aggregates['updated_at'], aggregates['activity_at'])
+        return state, max(filter(None, state), default=None)
+
+    def get_validators(self, request, *args, **kwargs):
+        return self.get_state(
+            Article.include_deleted.aggregate(**self.get_state_aggregates())
+        )
+
+    def list(self, request, *args, **kwargs):
+        response = self.get_conditional_response(request, *args, **kwargs)
+        if response is not None:
+            return response
+
+        page = self.paginate_feed(request)
+        if page is not None:
+            return self.get_paginated_response(page)
+
+        values_serializer = self.get_values_serializer()
+        if values_serializer is not None:
+            return self.list_values(values_serializer)
+
+        return super().list(request, *args, **kwargs)
+
+    def paginate_feed(self, request):
+        """
+        Returns the page from precomputed main page feed or None
+        if it can't be used for the request.
+        """
+        paginator = self.paginator
+        serializer = self.get_serializer()
+        allowed_params = {
+            paginator.cursor_query_param,
+            paginator.page_size_query_param,
+            serializer.fields_query_param,
+            serializer.expand_query_param,
+        }
+        if not set(request.query_params).issubset(allowed_params):
+            return None
+
+        feed = main_page_feed.load()
+        if feed is None:
+            return None
+
+        page = paginator.paginate_sorted(
+            feed['entries'],
+            request,
+            Article,
+            main_page_feed.get_position,
+            complete=feed['complete']
+        )
+        if page is None:
+            return None
+
+        # Sparse fieldsets
+        fields = serializer.fields.keys()
+        return [
+            {name: value for name, value in payload.items() if name in fields}
+            for position, payload in page
+        ]
+
+
+class AsyncArticleDetailView(AsyncReadView):
+    """
+    Async article detail, cached responses are sent without threads.
+    """
+    sync_view = staticmethod(ArticleViewSet.as_view({'get': 'retrieve'}))
+    read_from_replica = True
+
+    async def get(self, request, slug):
+        if not self.is_default_representation(request):
+            return await self.run_sync_view(request, slug=slug)
+
+        state = await ArticleViewSet.get_state_queryset(slug).afirst()
+        if state is None:
+            raise NotFound
+
+        response = self.get_conditional_response(
+            request, state, ArticleViewSet.get_last_modified(state)
+        )
+        if response is None:
+            content = await article_cache.aget(slug)
+            if content is None:
+                # Sync view renders and caches the article, and records the view
+                return await self.run_sync_view(request, slug=slug)
+
+            content = ArticleViewSet.add_view_count(content, state[-1])
+            response = self.render(None, content=content)
+            response['X-Cache'] = 'HIT'
+
+        if request.method == 'GET':
+            view_counter.record(slug)
+        return response
+
+
+class AsyncMainPageView(AsyncReadView):
+    """
+    Async main page from the precomputed feed,
+    pages the feed doesn't cover are queried by the async ORM.
+    """
+    sync_view = staticmethod(MainPageAPIView.as_view())
+    read_from_replica = True
+    query_params = (
+        KeysetPagination.cursor_query_param,
+        KeysetPagination.page_size_query_param,
+    )
+
+    async def get(self, request):
+        if not self.is_default_representation(request):
+            return await self.run_sync_view(request)
+
+        state, last_modified = MainPageAPIView.get_state(
+            await Article.include_deleted.aaggregate(**MainPageAPIView.get_state_aggregates())
+        )
+        response = self.get_conditional_response(request, state, last_modified)
+        if response is not None:
+            return response
+
+        paginator = MainPageAPIView.pagination_class()
+        drf_request = Request(request)
+
+        feed = await main_page_feed.aload()
+        page = None
+        if feed is not None:
+            page = paginator.paginate_sorted(
+                feed['entries'],
+                drf_request,
+                Article,
+                main_page_feed.get_position,
+                complete=feed['complete']
+            )
+
+        if page is not None:
+            data = [payload for position, payload in page]
+        else:
+            queryset = paginator.get_page_queryset(Article.objects.all(), drf_request)
+            articles = paginator.paginate_rows([article async for article in queryset])
+            data = ArticleListSerializer(articles, many=True).data
+
+        return self.render(paginator.get_paginated_response(data).data)
+
+
+class SearchPagination(KeysetPagination):
+    ordering = ('score', 'id')
+
+    def decode_position(self, values):
+        return float(values[0]), int(values[1])
+
+
+class SearchAPIView(GenericAPIView):
+    """
+    Full-text search of articles ranked by relevance: `?q=<words>`.
+    """
+    serializer_class = ArticleListSerializer
+    permission_classes = (AllowAny,)
+    pagination_class = SearchPagination
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '')
+        if not tokenize(query):
+            raise ValidationError({'q': ["Search query is required."]})
+
+        paginator = self.paginator
+        paginator.init_page(request)
+        cursor = paginator.cursor
+
+        rows = get_search_backend().search(
+            query,
+            position=cursor and cursor.position,
+            reverse=bool(cursor and cursor.reverse),
+            limit=paginator.page_size + 1
+        )
+        rows = paginator.paginate_rows(list(rows), get_position=lambda row: (row[1], row[0]))
+
+        queryset = build_query_plan(self.get_serializer(), Article).apply(Article.objects.all())
+        articles = queryset.in_bulk([article_id for article_id, score in rows])
+
+        # Index may be a bit behind deleted articles
+        page = [articles[article_id] for article_id, score in rows if article_id in articles]
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
+class ExportAPIView(APIView):
+    """
+    Streaming export of articles with comments and resources:
+    `?output=jsonl|csv&created_after=...&created_before=...&updated_after=...&updated_before=...`
+    """
+    permission_classes = (IsAdminUser,)
+    chunk_size = 1000
+
+    def get(self, request, *args, **kwargs):
+        serializer = ExportFilterSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+
+        export = ArticleExport(chunk_size=self.chunk_size, **serializer.validated_data)
+        response = StreamingHttpResponse(export, content_type=export.content_type)
+        response['Content-Disposition'] = 'attachment; filename="articles.%s"' % export.output
+        return response
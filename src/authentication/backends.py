@@ -1,27 +1,32 @@
 from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Q
 
 User = get_user_model()
 
 
-class EmailOrUsernameModelBackend:
+class EmailOrUsernameModelBackend(ModelBackend):
+    """
+    Authenticates users by username or email with one query
+    and exactly one password hash, missing users take as long as wrong passwords.
+    """
     def authenticate(self, request, username=None, password=None, **kwargs):
-        if '@' in username:
-            user_kwargs = {'email': username}
-        else:
-            user_kwargs = {'username': username}
-
-        try:
-            user = User.objects.get(**user_kwargs)
-        except User.DoesNotExist:
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
             return None
 
-        # check password
-        if user.check_password(password):
-            return user
-        # if pass is wrong then func returns None
+        users = list(User._default_manager.filter(Q(username=username) | Q(email=username))[:2])
+        # Username of one user may be email of another one
+        user = next((user for user in users if user.username == username), None)
+        if user is None and users:
+            user = users[0]
 
-    def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
+        if user is None:
+            # Runs the default password hasher to keep timing of existing users
+            User().set_password(password)
             return None
+
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,64 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class UserCache:
+    """
+    Per-process LRU cache of authenticated users with TTL.
+
+    Entries are keyed by user id and keep the token version they are valid for.
+    Ids are compared as strings, because tokens keep them so.
+    Saving a user invalidates its entry in the current process only,
+    other processes see the change after `JWT_USER_CACHE_TTL` seconds.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id, token_version: int):
+        """
+        Returns a copy of the cached user, so requests don't share the instance.
+        :return: user or None
+        """
+        key = str(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, version, user = entry
+            if expires_at <= now or version != token_version:
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+        return copy.copy(user)
+
+    def set(self, user, token_version: int):
+        key = str(user.pk)
+        expires_at = time.monotonic() + settings.JWT_USER_CACHE_TTL
+        with self._lock:
+            self._entries[key] = (expires_at, token_version, copy.copy(user))
+            self._entries.move_to_end(key)
+            while len(self._entries) > settings.JWT_USER_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+user_cache = UserCache()
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def policy_option(name: str, default):
+    """
+    Hasher attribute read from `PASSWORD_HASHER_OPTIONS[hasher.policy_name][name]`
+    setting, so work factors follow the setting without reloading hashers.
+    """
+    def get(self):
+        return settings.PASSWORD_HASHER_OPTIONS.get(self.policy_name, {}).get(name, default)
+    return property(get)
+
+
+# Algorithms keep names of Django hashers, so stored hashes are verified
+# whatever the work factors are, and hashes of other factors are updated on login
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    policy_name = 'pbkdf2'
+    iterations = policy_option('iterations', hashers.PBKDF2PasswordHasher.iterations)
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    policy_name = 'scrypt'
+    work_factor = policy_option('work_factor', hashers.ScryptPasswordHasher.work_factor)
+    block_size = policy_option('block_size', hashers.ScryptPasswordHasher.block_size)
+    parallelism = policy_option('parallelism', hashers.ScryptPasswordHasher.parallelism)
+    maxmem = policy_option('maxmem', hashers.ScryptPasswordHasher.maxmem)
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+    Requires `argon2-cffi` package.
+    """
+    policy_name = 'argon2'
+    time_cost = policy_option('time_cost', hashers.Argon2PasswordHasher.time_cost)
+    memory_cost = policy_option('memory_cost', hashers.Argon2PasswordHasher.memory_cost)
+    parallelism = policy_option('parallelism', hashers.Argon2PasswordHasher.parallelism)
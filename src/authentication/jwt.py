@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import user_cache
+
+# Claim with `User.token_version`, tokens issued without it have version 0
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def check_token_version(user, token):
+    if user.token_version != token.get(TOKEN_VERSION_CLAIM, 0):
+        raise AuthenticationFailed(_("Token is revoked."), code='token_revoked')
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication resolving users from per-process `user_cache`,
+    the database is queried on misses only.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        token_version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+        user = user_cache.get(user_id, token_version)
+        if user is not None:
+            return user
+
+        # Checks that the user exists and is active
+        user = super().get_user(validated_token)
+        check_token_version(user, validated_token)
+        user_cache.set(user, token_version)
+        return user
+
+
+class VersionedTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
+
+class VersionedTokenRefreshSerializer(TokenRefreshSerializer):
+    def validate(self, attrs):
+        # Refresh tokens issued before changing password are revoked too
+        refresh = self.token_class(attrs['refresh'])
+        user = get_user_model().objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is not None:
+            check_token_version(user, refresh)
+
+        return super().validate(attrs)
@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+PASSWORD = 'benchmark-password'
+
+
+class Command(BaseCommand):
+    help = "Reports password hashes/sec of hashers of the hashing policy with work factors " \
+           "of PASSWORD_HASHER_OPTIONS. Login, registration and password change hash once."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hashes', type=int, default=5, help="Hashes per thread.")
+        parser.add_argument(
+            '--threads', type=int, default=1,
+            help="Threads hashing at once, hashers release GIL."
+        )
+
+    def handle(self, *args, **options):
+        for name, path in settings.POLICY_HASHERS.items():
+            hasher = import_string(path)()
+            title = name + (" (PASSWORD_HASHER)" if name == settings.PASSWORD_HASHER else "")
+            try:
+                encoded = hasher.encode(PASSWORD, hasher.salt())
+            except ValueError as error:
+                # Library of the algorithm isn't installed
+                self.stdout.write("%s: %s" % (title, error))
+                continue
+
+            work_factors = ", ".join(
+                "%s=%s" % (key, value) for key, value in hasher.safe_summary(encoded).items()
+                if key not in ('algorithm', 'salt', 'hash')
+            )
+            hashes = options['hashes'] * options['threads']
+            seconds = self.measure(hasher, options['hashes'], options['threads'])
+            self.stdout.write("%s: %.1f hashes/sec, %.0f ms per hash (%s)" % (
+                title, hashes / seconds, seconds / hashes * options['threads'] * 1000, work_factors
+            ))
+
+    @staticmethod
+    def measure(hasher, hashes, threads) -> float:
+        def work():
+            for _ in range(hashes):
+                hasher.encode(PASSWORD, hasher.salt())
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            for future in [executor.submit(work) for _ in range(threads)]:
+                future.result()
+        return time.perf_counter() - start
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.benchmark import create_benchmark_user, measure, rollback
+
+PASSWORD = 'benchmark-password'
+MODEL_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+
+class Command(BaseCommand):
+    help = "Compares login throughput of `AUTHENTICATION_BACKENDS` " \
+           "with `ModelBackend` listed before it. Test data is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=5)
+
+    def handle(self, *args, **options):
+        backends = tuple(settings.AUTHENTICATION_BACKENDS)
+        configurations = {
+            # Previous configuration, it looks users up and hashes by every backend
+            "ModelBackend + AUTHENTICATION_BACKENDS": (MODEL_BACKEND,) + tuple(
+                backend for backend in backends if backend != MODEL_BACKEND
+            ),
+            "AUTHENTICATION_BACKENDS": backends,
+        }
+        with rollback():
+            user = create_benchmark_user(PASSWORD)
+            cases = {
+                "username": {'username': user.username, 'password': PASSWORD},
+                "email": {'username': user.email, 'password': PASSWORD},
+                "wrong password": {'username': user.email, 'password': 'wrong'},
+                "unknown user": {'username': 'unknown@benchmark.com', 'password': PASSWORD},
+            }
+
+            for title, configuration in configurations.items():
+                self.stdout.write("%s:" % title)
+                with override_settings(AUTHENTICATION_BACKENDS=configuration):
+                    for case, credentials in cases.items():
+                        with CaptureQueriesContext(connection) as queries:
+                            authenticate(**credentials)
+
+                        seconds = measure(lambda: authenticate(**credentials), 1, options['logins'])
+                        self.stdout.write("  %s: %.1f logins/sec, %d queries" % (
+                            case, 1 / seconds, len(queries)
+                        ))
@@ -1,6 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
+from django.contrib.auth.hashers import check_password, make_password
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin
 )
@@ -41,6 +42,9 @@ class User(TimestampedModel, PermissionsMixin, AbstractBaseUser):
     email = models.EmailField(_("user's email"), unique=True, db_index=True)
     is_active = models.BooleanField(_("user is active"), default=True)
     is_staff = models.BooleanField(_("user is staff"), default=False)
+    # Tokens are issued with the version in `ver` claim,
+    # changing password revokes tokens issued before
+    token_version = models.PositiveIntegerField(_("version of issued tokens"), default=0)
 
     USERNAME_FIELD = 'username'
     REQUIRED_FIELDS = ('email',)
@@ -54,6 +58,19 @@ class User(TimestampedModel, PermissionsMixin, AbstractBaseUser):
     def __str__(self):
         return self.username
 
+    def set_password(self, raw_password):
+        super().set_password(raw_password)
+        self.token_version += 1
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            # Rehashing by the current hashing policy keeps the password and tokens
+            self.password = make_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+
+        return check_password(raw_password, self.password, setter)
+
     def get_full_name(self):
         return self.username
 
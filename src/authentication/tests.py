@@ -1,11 +1,17 @@
 import json
 from copy import copy
 from typing import Any
+from unittest import mock
 
+from django.db import connection
 from django.urls import reverse
-from django.contrib.auth import get_user_model
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.test.utils import CaptureQueriesContext, override_settings
 from rest_framework.test import APITestCase, APIClient
 
+from .cache import user_cache
+
 User = get_user_model()
 
 
@@ -351,3 +357,152 @@ class RegisterTestCase(APITestCase):
         )
 
         self.assertEqual(response['status_code'], 400, msg=response)
+
+
+class AsyncUserTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            username=USER['username'], email=USER['email'], password=USER['password']
+        )
+
+    def test_async_user_retrieve(self):
+        url = reverse('api-auth:user-detail', kwargs={'username': USER['username']})
+        async_url = reverse('api-auth-async:user-detail', kwargs={'username': USER['username']})
+
+        response = self.client.get(async_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(self.client.get(url).content))
+
+        async_url = reverse('api-auth-async:user-detail', kwargs={'username': 'missing'})
+        self.assertEqual(self.client.get(async_url).status_code, 404)
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            username=USER['username'], email=USER['email'], password=USER['password']
+        )
+        self.tokens = get_tokens(self.client, USER['username'], USER['password'])
+        self.url = reverse('api-auth:user-change_password', kwargs={'username': USER['username']})
+        self.addCleanup(user_cache.clear)
+
+    def post_with_token(self, token: str, data: dict = None) -> int:
+        response = self.client.post(
+            self.url, data=json.dumps(data or {}), content_type=CONTENT_TYPE,
+            HTTP_AUTHORIZATION='Bearer ' + token
+        )
+        return response.status_code
+
+    def count_user_queries(self) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            self.post_with_token(self.tokens['access'])
+        return sum(1 for query in queries if 'FROM "authentication_user"' in query['sql'])
+
+    def test_user_cached(self):
+        # View and permission load the user by themselves too
+        queries = self.count_user_queries()
+        self.assertEqual(self.count_user_queries(), queries - 1)
+
+    def test_password_change_revokes_tokens(self):
+        status_code = self.post_with_token(self.tokens['access'], {
+            'current_password': USER['password'], 'new_password': 'Hj32fkjfds3'
+        })
+        self.assertEqual(status_code, 200)
+
+        self.assertEqual(self.post_with_token(self.tokens['access']), 401)
+        self.assertEqual(refresh_token(self.client, self.tokens['refresh'])['status_code'], 401)
+
+        tokens = get_tokens(self.client, USER['username'], 'Hj32fkjfds3')
+        self.assertEqual(self.post_with_token(tokens['access']), 400)
+
+    def test_deactivation_invalidates_user(self):
+        self.assertEqual(self.post_with_token(self.tokens['access']), 400)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.post_with_token(self.tokens['access']), 401)
+
+
+class EmailOrUsernameBackendTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            username=USER['username'], email=USER['email'], password=USER['password']
+        )
+
+    def authenticate(self, username, password=USER['password']):
+        hasher_class = type(get_hasher())
+        with mock.patch.object(
+                hasher_class, 'encode', autospec=True, side_effect=hasher_class.encode
+        ) as encode:
+            with self.assertNumQueries(1):
+                user = authenticate(username=username, password=password)
+
+        # `check_password` hashes by `encode` too
+        self.assertEqual(encode.call_count, 1)
+        return user
+
+    def test_single_query_and_hash(self):
+        self.assertEqual(self.authenticate(USER['username']), self.user)
+        self.assertEqual(self.authenticate(USER['email']), self.user)
+        self.assertIsNone(self.authenticate(USER['email'], 'wrong'))
+        self.assertIsNone(self.authenticate('unknown@user.com'))
+
+    def test_username_of_other_user_email(self):
+        other = User.objects.create_user(username=USER['email'], email='other@user.com', password='Kj3fdsf9d')
+        self.assertEqual(authenticate(username=USER['email'], password='Kj3fdsf9d'), other)
+
+    def test_missing_credentials(self):
+        self.assertIsNone(authenticate(username=None, password=USER['password']))
+        self.assertIsNone(authenticate(username=USER['username'], password=None))
+
+
+SCRYPT_FIRST = [
+    'authentication.hashers.ScryptPasswordHasher',
+    'authentication.hashers.PBKDF2PasswordHasher',
+]
+FAST_HASHERS = {'pbkdf2': {'iterations': 1000}, 'scrypt': {'work_factor': 2 ** 10}}
+
+
+@override_settings(PASSWORD_HASHER_OPTIONS=FAST_HASHERS)
+class HashingPolicyTestCase(APITestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            username=USER['username'], email=USER['email'], password=USER['password']
+        )
+        self.addCleanup(user_cache.clear)
+
+    def login(self) -> dict:
+        tokens = get_tokens(self.client, USER['username'], USER['password'])
+        self.assertEqual(tokens['status_code'], 200)
+        self.user.refresh_from_db()
+        return tokens
+
+    def test_work_factors_from_settings(self):
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_HASHER_OPTIONS={'pbkdf2': {'iterations': 2000}}):
+            self.login()
+            self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+        # Downgraded back
+        self.login()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+    def test_rehash_by_other_hasher_keeps_tokens(self):
+        token_version = self.user.token_version
+        with self.settings(PASSWORD_HASHERS=SCRYPT_FIRST):
+            tokens = self.login()
+            self.assertTrue(self.user.password.startswith('scrypt$'))
+            self.assertEqual(self.user.token_version, token_version)
+
+            # Token issued by the login that rehashed the password is valid
+            response = self.client.get(
+                reverse('api-auth:user-detail', kwargs={'username': USER['username']}),
+                HTTP_AUTHORIZATION='Bearer ' + tokens['access']
+            )
+            self.assertEqual(response.status_code, 200)
+
+            # Up to date hash isn't saved again
+            with CaptureQueriesContext(connection) as queries:
+                self.login()
+            self.assertFalse(any(query['sql'].startswith('UPDATE') for query in queries))
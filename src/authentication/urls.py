@@ -1,8 +1,9 @@
-from django.urls import path
+from django.urls import path, re_path
 from rest_framework_simplejwt import views as jwt_views
 from rest_framework.routers import SimpleRouter
 
 from .views import (
+    AsyncUserView,
     RegisterUserAPIView,
     UserViewSet,
 )
@@ -19,3 +20,8 @@ urlpatterns = [
     path('login/', jwt_views.token_obtain_pair, name='token-obtain-pair'),
     path('register/', RegisterUserAPIView.as_view(), name='register'),
 ] + router.urls
+
+# Async versions of read views, see `news_blog.urls`
+async_urlpatterns = [
+    re_path(r'^user/(?P<username>[^/.]+)/$', AsyncUserView.as_view(), name='user-detail'),
+]
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model, authenticate
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import AllowAny
 from rest_framework.generics import CreateAPIView
 from rest_framework.decorators import action
@@ -7,6 +8,8 @@ from rest_framework.viewsets import GenericViewSet
 from rest_framework import status
 from rest_framework import mixins
 
+from core.views import AsyncReadView
+
 from .permissions import IsSelf
 from .serializers import (RegisterSerializer,
                           UpdateUserSerializer,
@@ -72,3 +75,17 @@ class UserViewSet(mixins.CreateModelMixin,
             data=serializer.errors,
             status=status.HTTP_400_BAD_REQUEST
         )
+
+
+class AsyncUserView(AsyncReadView):
+    sync_view = staticmethod(UserViewSet.as_view({'get': 'retrieve'}))
+
+    async def get(self, request, username):
+        if not self.is_default_representation(request):
+            return await self.run_sync_view(request, username=username)
+
+        user = await UserViewSet.queryset.filter(username=username).afirst()
+        if user is None:
+            raise NotFound
+
+        return self.render(UpdateUserSerializer(user).data)
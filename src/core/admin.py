@@ -1,3 +1,28 @@
-from django.contrib import admin
+from django.contrib import messages
+from django.utils.translation import gettext_lazy as _, ngettext
 
-# Register your models here.
+
+class SoftDeleteAdminMixin:
+    """
+    Model admin mixin for `DeletableModel` models.
+
+    Deleted objects are listed too, "delete selected" action soft deletes
+    objects with their cascade and "restore selected" action brings them back.
+    """
+    actions = ('restore_selected',)
+    list_filter = ('is_deleted',)
+
+    def get_queryset(self, request):
+        queryset = self.model.include_deleted.get_queryset()
+        ordering = self.get_ordering(request)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
+    def restore_selected(self, request, queryset):
+        count, counts = queryset.restore()
+        self.message_user(request, ngettext(
+            'Restored %(count)d object.', 'Restored %(count)d objects.', count
+        ) % {'count': count}, messages.SUCCESS)
+
+    restore_selected.short_description = _('Restore selected %(verbose_name_plural)s')
@@ -0,0 +1,162 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from wsgiref.util import setup_testing_defaults
+
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connections, transaction
+
+
+def create_benchmark_user(password: str = None):
+    """
+    Creates a user with a unique username, so benchmarks never take over
+    and delete real users.
+    :param password: password of the user, unusable by default
+    :return: user
+    """
+    username = 'benchmark-%s' % uuid.uuid4().hex[:12]
+    return get_user_model().objects.create_user(username, username + '@benchmark.com', password)
+
+
+def measure(func, repeat: int = 5, number: int = 1) -> float:
+    """
+    Returns the best time of `repeat` runs of `number` calls of `func`.
+    :param func: callable without arguments
+    :param repeat: number of runs
+    :param number: number of calls in a run
+    :return: time of one call in seconds
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        elapsed = (time.perf_counter() - start) / number
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_threads(duration: float, workers: dict) -> dict:
+    """
+    Calls worker functions in a loop from their threads for `duration` seconds.
+    :param duration: seconds
+    :param workers: `{name: (func, number of threads)}`, functions take no arguments
+    :return: `{name: (latencies of successful calls in seconds, number of database errors)}`
+    """
+    deadline = time.perf_counter() + duration
+    results = {name: ([], []) for name in workers}
+
+    def work(func, latencies, errors):
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    func()
+                except DatabaseError:
+                    errors.append(1)
+                else:
+                    latencies.append(time.perf_counter() - start)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(sum(threads for func, threads in workers.values())) as executor:
+        futures = [
+            executor.submit(work, func, *results[name])
+            for name, (func, threads) in workers.items() for _ in range(threads)
+        ]
+        for future in futures:
+            future.result()
+
+    return {name: (latencies, len(errors)) for name, (latencies, errors) in results.items()}
+
+
+@contextmanager
+def rollback(using=None):
+    """
+    Runs the block in transaction which is rolled back,
+    so benchmarks don't change the database.
+    """
+    with transaction.atomic(using=using):
+        yield
+        transaction.set_rollback(True, using=using)
+
+
+def run_wsgi(application, paths, concurrency: int) -> tuple:
+    """
+    Sends GET requests to WSGI application from a pool of threads,
+    like a server with `concurrency` worker threads.
+    :return: time of all requests in seconds and their status codes
+    """
+    statuses = []
+
+    def start_response(status, headers, exc_info=None):
+        statuses.append(int(status.split(' ', 1)[0]))
+
+    def request(path):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path}
+        setup_testing_defaults(environ)
+        result = application(environ, start_response)
+        try:
+            for _ in result:
+                pass
+        finally:
+            # Sends `request_finished`, it closes database connections
+            result.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(executor.map(request, paths))
+    return time.perf_counter() - start, statuses
+
+
+def run_asgi(application, paths, concurrency: int) -> tuple:
+    """
+    Sends GET requests to ASGI application in one event loop,
+    at most `concurrency` of them at once.
+    :return: time of all requests in seconds and their status codes
+    """
+    statuses = []
+
+    async def request(path, semaphore):
+        scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'127.0.0.1')],
+            'client': ('127.0.0.1', 0),
+            'server': ('127.0.0.1', 80),
+        }
+
+        messages = [{'type': 'http.request', 'body': b'', 'more_body': False}]
+        finished = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            # Handler listens for the client disconnecting until the response is sent
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        async with semaphore:
+            await application(scope, receive, send)
+            finished.set()
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        await asyncio.gather(*(request(path, semaphore) for path in paths))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    return time.perf_counter() - start, statuses
@@ -0,0 +1,92 @@
+import re
+from typing import Optional, Sequence
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router, transaction
+
+# Pragmas allowed in `SQLITE_PRAGMAS` setting
+SQLITE_PRAGMAS = ('journal_mode', 'synchronous', 'mmap_size', 'cache_size', 'busy_timeout', 'temp_store')
+
+
+def reserve_ids(model, count: int, using: str = None) -> Optional[Sequence[int]]:
+    """
+    Takes next `count` values of the model primary key sequence,
+    so rows can be inserted with known ids by a single query.
+    :param model: model with auto primary key
+    :param count: number of ids
+    :param using: database alias, default one for writes of the model
+    :return: ids or None if the database doesn't support it
+    """
+    using = using or router.db_for_write(model)
+    connection = connections[using]
+    table = model._meta.db_table
+    column = model._meta.pk.column
+
+    if count <= 0:
+        return []
+
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)',
+                [connection.ops.quote_name(table), column, count]
+            )
+            # Values aren't consecutive if other sessions use the sequence
+            return [row[0] for row in cursor.fetchall()]
+
+    if connection.vendor == 'sqlite':
+        # AUTOINCREMENT tables keep the last id in `sqlite_sequence`,
+        # the write locks the database until the transaction ends,
+        # so callers insert the rows in the same transaction
+        with transaction.atomic(using=using, savepoint=False), connection.cursor() as cursor:
+            last = _increment_sqlite_sequence(connection, cursor, table, count)
+            if last is None:
+                cursor.execute(
+                    'INSERT INTO sqlite_sequence (name, seq) '
+                    'SELECT %%s, COALESCE(MAX(%s), 0) FROM %s' % (
+                        connection.ops.quote_name(column), connection.ops.quote_name(table)
+                    ),
+                    [table]
+                )
+                last = _increment_sqlite_sequence(connection, cursor, table, count)
+        return range(last - count + 1, last + 1)
+
+    return None
+
+
+def _increment_sqlite_sequence(connection, cursor, table, count):
+    if connection.features.can_return_columns_from_insert:
+        # SQLite 3.35+ supports RETURNING
+        cursor.execute(
+            'UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s RETURNING seq',
+            [count, table]
+        )
+    else:
+        cursor.execute(
+            'UPDATE sqlite_sequence SET seq = seq + %s WHERE name = %s', [count, table]
+        )
+        cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+
+    row = cursor.fetchone()
+    return row and row[0]
+
+
+def get_sqlite_pragmas(pragmas: dict) -> list:
+    """
+    Returns PRAGMA statements of the profile, they are checked
+    because statements can't have parameters.
+    :param pragmas: `{name: value}`, e.g. `{'journal_mode': 'wal'}`
+    :return: list of SQL statements
+    """
+    statements = []
+    for name, value in pragmas.items():
+        if name not in SQLITE_PRAGMAS:
+            raise ImproperlyConfigured(
+                "Unknown SQLite pragma %r, expected one of: %s." % (name, ', '.join(SQLITE_PRAGMAS))
+            )
+        if isinstance(value, bool) or not isinstance(value, (int, str)) \
+                or not re.fullmatch(r'-?\w+', str(value)):
+            raise ImproperlyConfigured("Invalid value %r of SQLite pragma %r." % (value, name))
+
+        statements.append('PRAGMA %s = %s' % (name, value))
+    return statements
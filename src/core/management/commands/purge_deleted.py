@@ -0,0 +1,53 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.purge import get_deletable_models, purge_deleted
+
+
+class Command(BaseCommand):
+    help = "Hard deletes rows soft deleted more than given number of days ago " \
+           "in short transactions. Interrupted purge is resumed by running it again."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help="Purge rows deleted more than this number of days ago."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=500,
+            help="Number of rows deleted in one transaction."
+        )
+        parser.add_argument(
+            '--archive',
+            help="JSON Lines file purged rows are appended to before deleting."
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0,
+            help="Seconds to sleep between chunks to let writers in."
+        )
+
+    def handle(self, *args, **options):
+        before = timezone.now() - timedelta(days=options['days'])
+        archive = None
+        if options['archive']:
+            archive = open(options['archive'], 'a', encoding='utf-8')
+
+        total = Counter()
+        try:
+            for model in get_deletable_models():
+                chunks = purge_deleted(model, before, options['chunk_size'], archive)
+                for counts in chunks:
+                    total.update(counts)
+                    if options['pause']:
+                        time.sleep(options['pause'])
+        finally:
+            if archive is not None:
+                archive.close()
+
+        for label, count in sorted(total.items()):
+            self.stdout.write("%s: %d" % (label, count))
+        self.stdout.write(self.style.SUCCESS("Purged %d rows." % sum(total.values())))
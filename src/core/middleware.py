@@ -1,6 +1,18 @@
+import hashlib
+
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
 from django.shortcuts import HttpResponsePermanentRedirect
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .routers import replica_reads
 
 
 class NoTrailingSlashPathMiddleware(MiddlewareMixin):
@@ -9,3 +21,73 @@ class NoTrailingSlashPathMiddleware(MiddlewareMixin):
             if '/admin' not in request.path and request.path != '/':
                 if request.path.endswith('/'):
                     return HttpResponsePermanentRedirect(request.path[:-1])
+
+
+class ReplicaRoutingMiddleware(MiddlewareMixin):
+    """
+    Lets safe requests of views with `read_from_replica = True` read from replicas.
+
+    Authenticated clients are identified by their user, anonymous ones by a hash
+    of the Authorization header, session cookie or address, so refreshed tokens
+    and new sessions keep the marker. After an unsafe request their reads stay
+    on the default database for `REPLICA_STICKY_SECONDS`, so they see their writes.
+    The marker is kept in the default cache, which must be shared by all workers.
+    """
+    key_prefix = 'replica-sticky'
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Markers in a private cache of the writing worker are missed by others
+        if settings.DATABASE_REPLICAS and \
+                isinstance(caches[DEFAULT_CACHE_ALIAS], (DummyCache, LocMemCache)):
+            raise ImproperlyConfigured(
+                "DATABASE_REPLICAS require the default cache shared by workers, not %s."
+                % type(caches[DEFAULT_CACHE_ALIAS]).__name__
+            )
+
+    def get_client_key(self, request) -> str:
+        user = self.get_user(request)
+        if user is not None:
+            client = 'user:%s' % user.pk
+        else:
+            client = (
+                request.headers.get('Authorization')
+                or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+                or request.META.get('REMOTE_ADDR', '')
+            )
+        return '%s:%s' % (self.key_prefix, hashlib.sha256(client.encode()).hexdigest())
+
+    @staticmethod
+    def get_user(request):
+        """
+        Returns authenticated user of the request or None.
+        Views authenticate requests after middlewares, so DRF authentication
+        classes are run here, on responses the user is set already.
+        """
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            try:
+                user = Request(request, authenticators=[
+                    authenticator() for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+                ]).user
+            except APIException:
+                return None
+
+        return user if user.is_authenticated else None
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.DATABASE_REPLICAS or request.method not in SAFE_METHODS:
+            return None
+
+        # DRF views keep their class in `cls`, Django views in `view_class`
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if getattr(view_class, 'read_from_replica', False) \
+                and cache.get(self.get_client_key(request)) is None:
+            replica_reads.set(True)
+        return None
+
+    def process_response(self, request, response):
+        replica_reads.set(False)
+        if settings.DATABASE_REPLICAS and request.method not in SAFE_METHODS:
+            cache.set(self.get_client_key(request), True, settings.REPLICA_STICKY_SECONDS)
+        return response
@@ -0,0 +1,240 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+from .serializers import ValuesSerializer
+
+
+class QueryPlan:
+    """
+    Related lookups and loaded fields collected from a serializer.
+    """
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = []
+        self.only = set()
+        # Becomes False when serializer reads something we can't predict
+        self.can_defer = True
+
+    def apply(self, queryset, defer=True):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        if defer and self.can_defer:
+            queryset = queryset.only(*self.only)
+        return queryset
+
+
+def build_query_plan(serializer, model, prefix=''):
+    """
+    Walks serializer fields and collects lookups needed to render it
+    without additional queries.
+    :param serializer: serializer instance (not `many=True` wrapper)
+    :param model: model rendered by serializer
+    :param prefix: lookup prefix for fields of `select_related` models
+    :return: QueryPlan
+    """
+    plan = QueryPlan()
+
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+
+        source = field.source
+        if source == '*' or '.' in source:
+            plan.can_defer = False
+            continue
+
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            # Property or method of the model
+            plan.can_defer = False
+            continue
+
+        if not model_field.is_relation:
+            plan.only.add(prefix + source)
+            continue
+
+        nested = field.child if isinstance(field, ListSerializer) else field
+
+        if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+            plan.only.add(prefix + source)
+            if isinstance(nested, BaseSerializer):
+                plan.select_related.append(prefix + source)
+                nested_plan = build_query_plan(
+                    nested, model_field.related_model, prefix + source + '__'
+                )
+                plan.select_related.extend(nested_plan.select_related)
+                plan.prefetch_related.extend(nested_plan.prefetch_related)
+                plan.only.update(nested_plan.only)
+                plan.can_defer = plan.can_defer and nested_plan.can_defer
+            continue
+
+        # Reverse and many-to-many relations
+        queryset = get_related_queryset(model_field.related_model)
+        if isinstance(nested, BaseSerializer):
+            nested_plan = build_query_plan(nested, model_field.related_model)
+            if model_field.one_to_many or model_field.one_to_one:
+                # Prefetch joins children by their foreign key
+                nested_plan.only.add(model_field.field.name)
+            queryset = nested_plan.apply(queryset)
+        elif model_field.one_to_many:
+            queryset = queryset.only(model_field.field.name)
+
+        plan.prefetch_related.append(Prefetch(prefix + source, queryset=queryset))
+
+    return plan
+
+
+def get_related_queryset(model):
+    # Default manager of deletable models already hides deleted rows
+    return model._default_manager.all()
+
+
+class QueryOptimizerMixin:
+    """
+    Generic view mixin that loads everything the view serializer renders
+    with `select_related`, `Prefetch` objects and `.only()`.
+
+    Fields are deferred on safe methods only, because saving a partially
+    loaded instance may skip fields changed in model `save` method.
+    """
+    def get_queryset(self):
+        return self.optimize_queryset(super().get_queryset())
+
+    def optimize_queryset(self, queryset, serializer=None):
+        if serializer is None:
+            serializer = self.get_serializer()
+
+        if getattr(serializer.Meta, 'model', None) is not queryset.model:
+            # e.g. actions with serializers of other models
+            return queryset
+
+        plan = build_query_plan(serializer, queryset.model)
+        plan.only.update(self.get_required_fields())
+        return plan.apply(queryset, defer=self.request.method in SAFE_METHODS)
+
+    def get_required_fields(self):
+        """
+        Fields used by the view itself, e.g. keyset of the paginator.
+        """
+        paginator = self.paginator
+        return {
+            name.lstrip('-') for name in getattr(paginator, 'ordering', ())
+        }
+
+
+def make_etag(request, media_type, state) -> str:
+    # Representation also depends on query parameters and format
+    state = (request.get_full_path(), media_type) + tuple(state)
+    return '"%s"' % hashlib.md5(repr(state).encode()).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    View mixin for conditional GET requests.
+
+    Handlers call `get_conditional_response` first and return its result
+    if it isn't None, so 304 is sent before any serializer runs.
+    `ETag` and `Last-Modified` are added to successful responses.
+    """
+    etag = None
+    last_modified = None
+
+    def get_validators(self, request, *args, **kwargs):
+        """
+        Returns tuple of values identifying current state of the resource
+        and its last modification datetime. Should be cheap.
+        """
+        raise NotImplementedError("`get_validators()` must be implemented.")
+
+    def get_conditional_response(self, request, *args, **kwargs):
+        if not self.set_validators(request, *args, **kwargs):
+            return None
+
+        return get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+
+    def set_validators(self, request, *args, **kwargs) -> bool:
+        """
+        Sets `etag` and `last_modified` of the current state of the resource.
+        :return: False if the resource has no validators
+        """
+        state, last_modified = self.get_validators(request, *args, **kwargs)
+        if state is None:
+            return False
+
+        self.etag = make_etag(request, request.accepted_media_type, state)
+        if last_modified is not None:
+            self.last_modified = int(last_modified.timestamp())
+        return True
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+
+        if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+            if self.etag is not None and not response.has_header('ETag'):
+                response['ETag'] = self.etag
+            if self.last_modified is not None and not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(self.last_modified)
+
+        return response
+
+
+class ValuesReadMixin:
+    """
+    Generic view mixin with opt-in (`FAST_READ_SERIALIZATION` setting)
+    read path rendering `.values()` rows by `ValuesSerializer`.
+
+    Object permissions aren't checked on this path,
+    so it's for public read views only.
+    """
+    def get_values_serializer(self):
+        """
+        Returns compiled view serializer or None if it can't be used.
+        """
+        if not settings.FAST_READ_SERIALIZATION or self.request.method not in SAFE_METHODS:
+            return None
+
+        serializer = self.get_serializer()
+        return ValuesSerializer.compile(serializer, serializer.Meta.model)
+
+    def get_object_values(self, values_serializer):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+
+        rows = values_serializer.fetch(queryset[:1])
+        if not rows:
+            raise Http404
+
+        return values_serializer.render(rows)[0]
+
+    def list_values(self, values_serializer):
+        """
+        Returns response rendered from rows, paginated by keyset paginator.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        paginator = self.paginator
+        if paginator is None:
+            return Response(values_serializer.render(values_serializer.fetch(queryset)))
+
+        ordering = [name.lstrip('-') for name in paginator.ordering]
+        queryset = paginator.get_page_queryset(queryset, self.request)
+        rows = values_serializer.fetch(queryset, ordering)
+        rows = paginator.paginate_rows(
+            rows, get_position=lambda row: tuple(row[name] for name in ordering)
+        )
+        return paginator.get_paginated_response(values_serializer.render(rows))
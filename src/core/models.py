@@ -1,8 +1,100 @@
-from django.db import models
+from collections import defaultdict
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from .signals import restored, soft_deleted
+
+
+def collect_cascade(root_model, pks, same_deleted_at=False) -> dict:
+    """
+    Returns conditions of rows in `soft_delete_cascade` of given rows by models.
+    Conditions refer to `pks` of the root model, so they don't depend
+    on rows changed by previous updates.
+    :param root_model: model of rows
+    :param pks: primary keys of rows
+    :param same_deleted_at: related rows must be deleted at the same time
+        as their root row, i.e. by its cascade. Conditions refer to
+        `deleted_at` of root rows, so they must be updated last
+    :return: `{model: Q}` starting with the root model
+    """
+    conditions = defaultdict(Q)
+    queue = [(root_model, 'pk')]
+    while queue:
+        model, path = queue.pop(0)
+        condition = Q(**{path + '__in': pks})
+        if same_deleted_at and model is not root_model:
+            condition &= Q(deleted_at=F(path[:-len('pk')] + 'deleted_at'))
+        conditions[model] |= condition
+
+        for name in getattr(model, 'soft_delete_cascade', ()):
+            relation = model._meta.get_field(name)
+            queue.append((relation.related_model, relation.field.name + '__' + path))
+
+    return conditions
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """
+    `delete` and `restore` set `is_deleted` flag and `deleted_at` by one UPDATE per table,
+    cascading to relations listed in `soft_delete_cascade` of the model,
+    e.g. `soft_delete_cascade = ('comments',)`.
+    `auto_now` fields of changed rows are updated too.
+    """
+    def delete(self):
+        return self._set_deleted(True)
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def restore(self):
+        return self._set_deleted(False)
+
+    restore.alters_data = True
+    restore.queryset_only = True
+
+    def hard_delete(self):
+        return super().delete()
 
-class ExcludeDeletedManager(models.Manager):
+    hard_delete.alters_data = True
+    hard_delete.queryset_only = True
+
+    def _set_deleted(self, is_deleted):
+        """
+        :return: number of changed rows and their numbers per model like `QuerySet.delete`
+        """
+        with transaction.atomic(using=self.db):
+            pks = list(self.filter(is_deleted=not is_deleted).values_list('pk', flat=True))
+            if not pks:
+                return 0, {}
+
+            counts = {}
+            now = timezone.now()
+            # Restore skips related rows deleted before their root row
+            conditions = list(collect_cascade(self.model, pks, same_deleted_at=not is_deleted).items())
+            if not is_deleted:
+                conditions = conditions[1:] + conditions[:1]
+
+            for model, condition in conditions:
+                values = {'is_deleted': is_deleted, 'deleted_at': now if is_deleted else None}
+                values.update(
+                    (field.name, now) for field in model._meta.concrete_fields
+                    if getattr(field, 'auto_now', False)
+                )
+                counts[model._meta.label] = model._base_manager.using(self.db).filter(
+                    condition, is_deleted=not is_deleted
+                ).update(**values)
+
+            # Receivers may keep dependent data in the same transaction
+            signal = soft_deleted if is_deleted else restored
+            signal.send(sender=self.model, pks=pks, using=self.db)
+
+        return sum(counts.values()), counts
+
+
+class ExcludeDeletedManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
     def get_queryset(self):
         return super().get_queryset().filter(is_deleted=False)
 
@@ -17,13 +109,26 @@ class TimestampedModel(models.Model):
 
 class DeletableModel(models.Model):
     is_deleted = models.BooleanField(verbose_name=_('Object is deleted.'), default=False)
+    deleted_at = models.DateTimeField(verbose_name=_('Date and time of deleting'), null=True, blank=True)
 
     objects = ExcludeDeletedManager()
-    include_deleted = models.Manager()
+    include_deleted = SoftDeleteQuerySet.as_manager()
+
+    # Reverse relations deleted and restored with the object
+    soft_delete_cascade = ()
 
     class Meta:
         abstract = True
 
     def delete(self, using=None, keep_parents=False):
+        result = type(self).include_deleted.using(using or self._state.db).filter(pk=self.pk).delete()
         self.is_deleted = True
-        self.save()
+        return result
+
+    def restore(self, using=None):
+        result = type(self).include_deleted.using(using or self._state.db).filter(pk=self.pk).restore()
+        self.is_deleted = False
+        return result
+
+    def hard_delete(self, using=None, keep_parents=False):
+        return super().delete(using, keep_parents)
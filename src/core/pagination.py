@@ -0,0 +1,273 @@
+import json
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+Cursor = namedtuple('Cursor', ['position', 'reverse'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Opaque cursor pagination over a unique compound key.
+
+    Unlike DRF `CursorPagination` it never falls back to offsets:
+    the cursor keeps values of all `ordering` fields of the boundary row,
+    so every page is a single range scan over the matching index
+    and inserted rows don't shift items between pages.
+    """
+    # Last field must be unique
+    ordering = ('-created_at', '-id')
+    cursor_query_param = 'cursor'
+    page_size = settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.get_page_queryset(queryset, request)
+        if queryset is None:
+            return None
+
+        return self.paginate_rows(list(queryset))
+
+    def get_page_queryset(self, queryset, request):
+        """
+        Returns lazy queryset of the requested page with one extra row,
+        so it can be evaluated by sync or async code.
+        """
+        if not self.init_page(request, queryset.model):
+            return None
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        if self.cursor is not None:
+            queryset = queryset.filter(
+                self.get_keyset_filter(self.cursor.position, reverse)
+            )
+
+        return queryset.order_by(*self.get_ordering(reverse))[:self.page_size + 1]
+
+    def init_page(self, request, model=None):
+        """
+        Reads page size and cursor of the request.
+        :return: False if pagination is disabled
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return False
+
+        self.base_url = request.build_absolute_uri()
+        self.model = model
+        self.cursor = self.decode_cursor(request)
+        return True
+
+    def paginate_sorted(self, rows, request, model, get_position, complete=False):
+        """
+        Paginates rows already sorted by `ordering`, e.g. precomputed ones.
+        :param rows: leading rows of the whole ordered sequence
+        :param request: request
+        :param model: model of rows, it's used to decode cursor
+        :param get_position: callable returning keyset of a row
+        :param complete: rows are the whole sequence
+        :return: list of page rows or None if rows don't cover the page
+        """
+        if not self.init_page(request, model):
+            return None
+
+        if self.cursor is None:
+            page = rows[:self.page_size + 1]
+        elif not self.cursor.reverse:
+            start = self._bisect(rows, self.cursor.position, get_position, True)
+            page = rows[start:start + self.page_size + 1]
+        else:
+            # Rows are leading, so previous pages are always covered
+            end = self._bisect(rows, self.cursor.position, get_position, False)
+            page = rows[max(end - self.page_size - 1, 0):end][::-1]
+            complete = True
+
+        if len(page) <= self.page_size and not complete:
+            return None
+
+        return self.paginate_rows(list(page), get_position)
+
+    def _bisect(self, rows, position, get_position, inclusive):
+        """
+        Returns index of the first row following `position`
+        (or following or equal to it if not `inclusive`).
+        """
+        low, high = 0, len(rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self._precedes(get_position(rows[middle]), position, inclusive):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _precedes(self, first, second, inclusive):
+        for name, a, b in zip(self.ordering, first, second):
+            if a != b:
+                return (a < b) != name.startswith('-')
+        return inclusive
+
+    def paginate_first_page(self, queryset, base_url, page_size=None):
+        """
+        Returns the first page for embedding into other responses,
+        `base_url` is url of the paginated resource.
+        """
+        self.page_size = page_size or self.page_size
+        self.base_url = base_url
+        self.cursor = None
+
+        queryset = queryset.order_by(*self.ordering)[:self.page_size + 1]
+        return self.paginate_rows(list(queryset))
+
+    def paginate_rows(self, rows, get_position=None):
+        """
+        Cuts fetched rows to the page and computes neighbour cursors.
+        :param rows: rows fetched by `get_page_queryset` (page size + 1).
+        :param get_position: callable returning keyset of a row.
+        :return: list of page rows
+        """
+        get_position = get_position or self.get_position
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        has_following = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.next_position, self.previous_position = None, None
+        if rows:
+            if has_following or reverse:
+                self.next_position = get_position(rows[-1])
+            if self.cursor is not None and (has_following or not reverse):
+                self.previous_position = get_position(rows[0])
+        elif self.cursor is not None:
+            # Page is empty, so cursor position is the only boundary
+            if reverse:
+                self.next_position = self.cursor.position
+            else:
+                self.previous_position = self.cursor.position
+
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param],
+                    strict=True,
+                    cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return self.ordering
+
+        return tuple(
+            name[1:] if name.startswith('-') else '-' + name
+            for name in self.ordering
+        )
+
+    def get_keyset_filter(self, position, reverse=False):
+        """
+        Builds condition `(f1, f2, ...) > (v1, v2, ...)` in ordering terms.
+
+        Leading field gets an inclusive bound, so the planner can use
+        a range scan on the compound index even without row values support.
+        """
+        conditions = Q()
+        equal = {}
+        for name, value in zip(self.ordering, position):
+            lookup = 'lt' if name.startswith('-') != reverse else 'gt'
+            name = name.lstrip('-')
+            conditions |= Q(**equal, **{name + '__' + lookup: value})
+            equal[name] = value
+
+        leading = self.ordering[0]
+        lookup = 'lte' if leading.startswith('-') != reverse else 'gte'
+        return Q(**{leading.lstrip('-') + '__' + lookup: position[0]}) & conditions
+
+    def get_position(self, instance):
+        return tuple(getattr(instance, name.lstrip('-')) for name in self.ordering)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(Cursor(self.next_position, False))
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(Cursor(self.previous_position, True))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            data = json.loads(b64decode(encoded.encode('ascii')).decode('utf-8'))
+            position = data['p']
+            if len(position) != len(self.ordering):
+                raise ValueError
+
+            position = self.decode_position(position)
+            if None in position:
+                raise ValueError
+
+            return Cursor(position, bool(data.get('r')))
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def decode_position(self, values):
+        return tuple(
+            self.model._meta.get_field(name.lstrip('-')).to_python(value)
+            for name, value in zip(self.ordering, values)
+        )
+
+    def encode_cursor(self, cursor):
+        data = {
+            'p': [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in cursor.position
+            ],
+        }
+        if cursor.reverse:
+            data['r'] = 1
+
+        encoded = b64encode(
+            json.dumps(data, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
@@ -0,0 +1,76 @@
+import json
+import os
+from typing import Iterator, Optional, TextIO
+
+from django.apps import apps
+from django.db import transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import DeletableModel, collect_cascade
+
+
+def get_deletable_models() -> list:
+    """
+    Returns `DeletableModel` models, models are followed by their `soft_delete_cascade`.
+    """
+    models = [model for model in apps.get_models() if issubclass(model, DeletableModel)]
+    children = {
+        model: {model._meta.get_field(name).related_model for name in model.soft_delete_cascade}
+        for model in models
+    }
+
+    def depth(model):
+        return max((depth(parent) + 1 for parent in models if model in children[parent]), default=0)
+
+    return sorted(models, key=depth)
+
+
+def purge_deleted(
+        model, before, chunk_size: int = 500, archive: Optional[TextIO] = None, using: str = None
+) -> Iterator[dict]:
+    """
+    Hard deletes rows soft deleted before given time with their cascade,
+    chunk by chunk in separate transactions.
+
+    Purged rows are gone, so an interrupted purge is resumed by running it again.
+    Rows of a chunk are archived before its transaction is committed,
+    so the archive may repeat rows of a failed chunk.
+    :param model: `DeletableModel` model
+    :param before: `deleted_at` bound
+    :param chunk_size: number of rows of the model deleted in one transaction
+    :param archive: text file for JSON Lines `{"model": label, "fields": {...}}`
+    :param using: database alias
+    :return: iterator of numbers of deleted rows per model for every chunk
+    """
+    queryset = model.include_deleted.using(using).filter(
+        is_deleted=True, deleted_at__lt=before
+    ).order_by('pk')
+    last_pk = None
+
+    while True:
+        with transaction.atomic(using=using):
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            pks = list(chunk.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                return
+
+            if archive is not None:
+                write_archive(archive, model, pks, using)
+
+            count, counts = model.include_deleted.using(using).filter(pk__in=pks).hard_delete()
+
+        last_pk = pks[-1]
+        yield counts
+
+
+def write_archive(archive, model, pks, using=None):
+    for related_model, condition in collect_cascade(model, pks).items():
+        rows = related_model._base_manager.using(using).filter(condition).values()
+        for row in rows.iterator():
+            archive.write(json.dumps(
+                {'model': related_model._meta.label, 'fields': row},
+                cls=JSONEncoder, ensure_ascii=False
+            ) + '\n')
+
+    archive.flush()
+    os.fsync(archive.fileno())
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .db import get_sqlite_pragmas
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """
+    Applies `SQLITE_PRAGMAS` profile to new SQLite connections.
+    """
+    if connection.vendor != 'sqlite':
+        return
+
+    with connection.cursor() as cursor:
+        for statement in get_sqlite_pragmas(settings.SQLITE_PRAGMAS):
+            cursor.execute(statement)
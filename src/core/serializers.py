@@ -0,0 +1,202 @@
+from collections import defaultdict
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer, ListSerializer
+from rest_framework.settings import api_settings
+
+
+def parse_list_param(request, name):
+    """
+    Returns set of comma separated values of query parameter
+    or None if it isn't given.
+    """
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+
+class SparseFieldsetsMixin:
+    """
+    Serializer mixin trimming rendered fields by query parameters:
+     - `fields` - comma separated fields to render;
+     - `expand` - comma separated nested relations to render,
+       relations which aren't listed are dropped.
+
+    It's applied to the root serializer of safe requests only.
+    Views build querysets from serializer fields, so trimmed fields
+    aren't loaded from database too.
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS or not self._is_root():
+            return fields
+
+        only = parse_list_param(request, self.fields_query_param)
+        expand = parse_list_param(request, self.expand_query_param)
+        if only is None and expand is None:
+            return fields
+
+        for name, field in list(fields.items()):
+            is_relation = isinstance(field, BaseSerializer)
+            if expand is not None and name in expand:
+                continue
+            if (only is not None and name not in only) or (is_relation and expand is not None):
+                del fields[name]
+
+        return fields
+
+    def _is_root(self):
+        parent = self.parent
+        if isinstance(parent, ListSerializer):
+            parent = parent.parent
+        return parent is None
+
+
+class UnsupportedField(Exception):
+    pass
+
+
+# Fields whose `to_representation` returns model values as is
+IDENTITY_FIELDS = (
+    serializers.CharField,
+    serializers.ChoiceField,
+    serializers.IntegerField,
+    serializers.BooleanField,
+)
+
+VALUE, NESTED, MANY = range(3)
+
+
+class ValuesSerializer:
+    """
+    Read-only serializer rendering `.values()` rows.
+
+    It's compiled from a model serializer instance into a list of
+    precompiled getters, so no serializer and model instances are created
+    per object. Forward nested relations are joined into the same row,
+    reverse ones are fetched by one query per relation.
+    Output matches output of the source serializer.
+    """
+    def __init__(self, serializer, model, prefix='', nested=False):
+        self.model = model
+        self.pk_column = prefix + model._meta.pk.attname
+        self.columns = [self.pk_column]
+        self.getters = []
+
+        for name, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            source = field.source
+            if source == '*' or '.' in source:
+                raise UnsupportedField(name)
+
+            try:
+                model_field = model._meta.get_field(source)
+            except FieldDoesNotExist:
+                raise UnsupportedField(name)
+
+            if not model_field.is_relation:
+                self.columns.append(prefix + source)
+                self.getters.append((VALUE, name, prefix + source, self.get_converter(field)))
+
+            elif model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+                column = prefix + model_field.attname
+                self.columns.append(column)
+
+                if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                    self.getters.append((VALUE, name, column, None))
+                elif isinstance(field, serializers.BaseSerializer) and \
+                        not isinstance(field, serializers.ListSerializer):
+                    node = ValuesSerializer(
+                        field, model_field.related_model, prefix + source + '__', nested=True
+                    )
+                    self.columns.extend(node.columns)
+                    self.getters.append((NESTED, name, column, node))
+                else:
+                    raise UnsupportedField(name)
+
+            elif model_field.one_to_many and not nested and \
+                    isinstance(field, serializers.ListSerializer):
+                node = ValuesSerializer(field.child, model_field.related_model)
+                self.getters.append((MANY, name, model_field.field.attname, node))
+
+            else:
+                raise UnsupportedField(name)
+
+    @staticmethod
+    def get_converter(field):
+        if isinstance(field, IDENTITY_FIELDS):
+            return None
+
+        to_representation = field.to_representation
+
+        if isinstance(field, serializers.DateTimeField):
+            # Precompiled `DateTimeField.to_representation` for aware ISO 8601 output
+            output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+            field_timezone = getattr(field, 'timezone', field.default_timezone())
+            if output_format is not None and output_format.lower() == ISO_8601 and \
+                    field_timezone is not None:
+                def convert_datetime(value):
+                    if not value or value.tzinfo is None:
+                        return None if value is None else to_representation(value)
+                    value = value.astimezone(field_timezone).isoformat()
+                    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+                return convert_datetime
+
+        return lambda value: None if value is None else to_representation(value)
+
+    @classmethod
+    def compile(cls, serializer, model):
+        """
+        Returns compiled serializer or None if serializer has unsupported fields.
+        """
+        try:
+            return cls(serializer, model)
+        except UnsupportedField:
+            return None
+
+    def fetch(self, queryset, extra_columns=()):
+        """
+        Returns rows of queryset with columns needed for rendering.
+        """
+        columns = self.columns + [c for c in extra_columns if c not in self.columns]
+        return list(queryset.prefetch_related(None).values(*columns))
+
+    def render(self, rows) -> list:
+        many = {}
+        for kind, name, foreign_key, node in self.getters:
+            if kind != MANY:
+                continue
+
+            parent_ids = [row[self.pk_column] for row in rows]
+            child_rows = node.fetch(
+                node.model._default_manager.filter(**{foreign_key + '__in': parent_ids}),
+                (foreign_key,)
+            )
+            grouped = defaultdict(list)
+            for row, data in zip(child_rows, node.render(child_rows)):
+                grouped[row[foreign_key]].append(data)
+            many[name] = grouped
+
+        return [self.render_row(row, many) for row in rows]
+
+    def render_row(self, row, many=None) -> dict:
+        data = {}
+        for kind, name, column, getter in self.getters:
+            if kind == VALUE:
+                value = row[column]
+                data[name] = value if getter is None else getter(value)
+            elif kind == NESTED:
+                data[name] = None if row[column] is None else getter.render_row(row)
+            else:
+                data[name] = many[name].get(row[self.pk_column], [])
+        return data
@@ -0,0 +1,7 @@
+from django.dispatch import Signal
+
+# Sent by `SoftDeleteQuerySet` after rows and their cascade are soft deleted
+# or restored. `sender` is the model of the queryset.
+# Arguments: `pks`, `using`
+soft_deleted = Signal()
+restored = Signal()
@@ -1,3 +1,281 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from copy import deepcopy
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection, connections
+from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from articles.models import Article, Comment, Resource
+from articles.tests import ARTICLE, COMMENT, USER, ArticleCommentMixin
+
+from .db import get_sqlite_pragmas
+from .middleware import ReplicaRoutingMiddleware
+
+UserModel = get_user_model()
+
+
+class SoftDeleteTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        for i in range(2):
+            article = deepcopy(ARTICLE)
+            article['title'] = 'Article %d' % i
+            self.create_article(article)
+
+        for article in Article.objects.all():
+            comment = Comment.objects.create(article=article, author=self.user, text='Comment')
+            Resource.objects.create(comment=comment, url='https://test.com', type='IMG')
+
+    def test_soft_delete_cascade(self):
+        with CaptureQueriesContext(connection) as context:
+            count, counts = Article.objects.filter(title='Article 0').delete()
+
+        updates = [q for q in context.captured_queries if 'SET "is_deleted"' in q['sql']]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(counts, {'articles.Article': 1, 'articles.Comment': 1, 'articles.Resource': 4})
+
+        article = Article.include_deleted.get(title='Article 0')
+        self.assertFalse(article.comments.exists())
+        self.assertFalse(Resource.objects.filter(comment__article=article).exists())
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Resource.objects.count(), 4)
+
+    def test_soft_delete_restore(self):
+        Comment.objects.filter(article__title='Article 1').delete()
+        Article.objects.all().delete()
+        self.assertEqual(Article.include_deleted.filter(is_deleted=True).count(), 2)
+
+        # Comment deleted before its article stays deleted with its resource
+        count, counts = Article.include_deleted.all().restore()
+        self.assertEqual(count, 2 + 1 + 7)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Resource.objects.count(), 7)
+
+    def test_soft_delete_restore_cascade_only(self):
+        article = Article.objects.get(title='Article 0')
+        Comment.objects.create(article=article, author=self.user, text='spam')
+        Comment.objects.filter(text='spam').delete()
+        article.delete()
+
+        article.restore()
+        article.refresh_from_db()
+        self.assertEqual(list(article.comments.values_list('text', flat=True)), ['Comment'])
+        self.assertEqual(article.comment_count, 1)
+        self.assertTrue(Comment.include_deleted.get(text='spam').is_deleted)
+
+    def test_hard_delete(self):
+        Article.objects.filter(title='Article 0').hard_delete()
+        self.assertEqual(Article.include_deleted.count(), 1)
+        self.assertEqual(Comment.include_deleted.count(), 1)
+
+    def test_admin_restore(self):
+        article = Article.objects.get(title='Article 0')
+        article.delete()
+        self.client.force_login(UserModel.objects.create_superuser('admin', 'admin@admin.com', 'admin'))
+
+        response = self.client.post(reverse('admin:articles_article_changelist'), {
+            'action': 'restore_selected', '_selected_action': [article.pk],
+        })
+        self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+        self.assertTrue(Article.objects.filter(pk=article.pk).exists())
+        self.assertEqual(article.comments.count(), 1)
+
+
+class PurgeDeletedTestCase(ArticleCommentMixin, APITestCase):
+    def setUp(self) -> None:
+        super().set_up()
+        for i in range(3):
+            article = deepcopy(ARTICLE)
+            article['title'] = 'Article %d' % i
+            self.create_article(article)
+
+        for article in Article.objects.all():
+            Comment.objects.create(article=article, author=self.user, text='Comment')
+
+        Article.objects.filter(title__in=['Article 0', 'Article 1']).delete()
+        Comment.objects.filter(article__title='Article 2').delete()
+        # Article 1 is deleted recently
+        Article.include_deleted.exclude(title='Article 1').update(deleted_at='2000-01-01T00:00Z')
+        Comment.include_deleted.exclude(article__title='Article 1').update(deleted_at='2000-01-01T00:00Z')
+
+    def test_purge_deleted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'archive.jsonl')
+            call_command('purge_deleted', days=1, chunk_size=1, archive=path, stdout=StringIO())
+            with open(path) as archive:
+                models = [json.loads(line)['model'] for line in archive]
+
+        self.assertEqual(
+            sorted(models),
+            ['articles.Article'] + ['articles.Comment'] * 2 + ['articles.Resource'] * 3
+        )
+        self.assertEqual(
+            list(Article.include_deleted.values_list('title', flat=True).order_by('title')),
+            ['Article 1', 'Article 2']
+        )
+        self.assertEqual(Comment.include_deleted.count(), 1)
+        self.assertEqual(Resource.include_deleted.count(), 6)
+
+    def test_purge_deleted_resumed(self):
+        call_command('purge_deleted', days=1, stdout=StringIO())
+        output = StringIO()
+        call_command('purge_deleted', days=1, stdout=output)
+        self.assertIn('Purged 0 rows.', output.getvalue())
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite pragmas")
+class SQLitePragmasTestCase(APITestCase):
+    def test_pragmas_applied_to_connections(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS['busy_timeout'])
+
+    def test_invalid_pragmas(self):
+        self.assertEqual(
+            get_sqlite_pragmas({'journal_mode': 'wal', 'cache_size': -8000}),
+            ['PRAGMA journal_mode = wal', 'PRAGMA cache_size = -8000']
+        )
+        for pragmas in ({'foreign_keys': 0}, {'journal_mode': 'wal; DROP TABLE x'}, {'mmap_size': 1.5}):
+            with self.assertRaises(ImproperlyConfigured):
+                get_sqlite_pragmas(pragmas)
+
+
+class ReplicaRoutingTestCase(ArticleCommentMixin, APITestCase):
+    """
+    Replica is another SQLite database with the same article,
+    but other title and number of views, and renamed users.
+
+    It's added by the test case, so the test runner doesn't check it
+    with databases of settings.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        default = connections.settings['default']
+        connections.settings['replica'] = dict(
+            default,
+            NAME=os.path.join(cls.directory.name, 'replica.sqlite3'),
+            TEST=dict(default['TEST'], NAME=None)
+        )
+        call_command('migrate', database='replica', verbosity=0)
+        cls.databases = {'default', 'replica'}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.settings['replica']
+        cls.directory.cleanup()
+
+    def setUp(self) -> None:
+        # Sticky markers need a cache shared by workers
+        shared_cache = self.settings(
+            DATABASE_REPLICAS=['replica'],
+            CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': os.path.join(self.directory.name, 'cache'),
+            }}
+        )
+        shared_cache.enable()
+        self.addCleanup(shared_cache.disable)
+        self.addCleanup(cache.clear)
+
+        super().set_up()
+        self.create_article()
+        article = Article.objects.get()
+        self.slug = article.slug
+
+        replica_users = list(UserModel.objects.all())
+        for user in replica_users:
+            user.username = 'replica-' + user.username
+        UserModel.objects.using('replica').bulk_create(replica_users)
+        article.title, article.view_count = 'Replica title', 7
+        Article.objects.using('replica').bulk_create([article])
+
+    def get_view_count(self, **kwargs) -> int:
+        # Representations with query parameters aren't cached
+        url = reverse('articles:article-detail', kwargs={'slug': self.slug})
+        return json.loads(self.client.get(url + '?comments=preview', **kwargs).content)['view_count']
+
+    def test_safe_reads_use_replica(self):
+        self.assertEqual(self.get_view_count(), 7)
+
+        url = reverse('articles:article-detail', kwargs={'slug': self.slug})
+        response = self.client.get(url + '?comments=preview')
+        self.assertEqual(json.loads(response.content)['title'], 'Replica title')
+
+        # Views without `read_from_replica`
+        url = reverse('api-auth:user-detail', kwargs={'username': self.author.username})
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+    def test_shared_caches_are_built_from_primary(self):
+        url = reverse('articles:article-detail', kwargs={'slug': self.slug})
+        for cache_status in ('MISS', 'HIT'):
+            response = self.client.get(url)
+            self.assertEqual(response['X-Cache'], cache_status)
+            self.assertEqual(json.loads(response.content)['title'], ARTICLE['title'])
+
+        response = self.client.get(reverse('articles:main-page'))
+        self.assertEqual(json.loads(response.content)['results'][0]['title'], ARTICLE['title'])
+
+    def test_reads_stick_to_primary_after_write(self):
+        self.client.force_authenticate(self.user)
+        url_add_comment = reverse('articles:article-add-comment', kwargs={'slug': self.slug})
+        response = self.client.post(url_add_comment, data=COMMENT, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Writer is identified by the user, not by its address
+        self.assertEqual(self.get_view_count(REMOTE_ADDR='127.0.0.2'), 0)
+        # Other clients still read from replicas
+        self.client.force_authenticate(self.author)
+        self.assertEqual(self.get_view_count(), 7)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.get_view_count(), 7)
+
+        self.client.force_authenticate(self.user)
+        with self.settings(REPLICA_STICKY_SECONDS=0):
+            self.client.post(url_add_comment, data=COMMENT, format='json')
+        self.assertEqual(self.get_view_count(), 7)
+
+    def test_refreshed_token_sticks_to_primary(self):
+        tokens = self.client.post(reverse('api-auth:token-obtain-pair'), data={
+            'username': USER['username'], 'password': USER['password']
+        }, format='json').data
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + tokens['access'])
+        url_add_comment = reverse('articles:article-add-comment', kwargs={'slug': self.slug})
+        response = self.client.post(url_add_comment, data=COMMENT, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.client.credentials()
+        access = self.client.post(
+            reverse('api-auth:token-refresh'), data={'refresh': tokens['refresh']}, format='json'
+        ).data['access']
+        self.assertNotEqual(access, tokens['access'])
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + access)
+        self.assertEqual(self.get_view_count(), 0)
+
+        # Invalid tokens are rejected by the view, not by the middleware
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(self.client.get(
+            reverse('articles:article-detail', kwargs={'slug': self.slug}) + '?comments=preview'
+        ).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_private_cache_is_rejected(self):
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }}):
+            with self.assertRaises(ImproperlyConfigured):
+                ReplicaRoutingMiddleware(lambda request: None)
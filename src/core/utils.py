@@ -1,10 +1,15 @@
+from functools import lru_cache
+
+from django.core.cache.backends.locmem import LocMemCache
 from django.template.defaultfilters import slugify as default_slugify
 from unidecode import unidecode
 
 
+@lru_cache(maxsize=4096)
 def slugify(raw_text: str) -> str:
     """
     Transliterated non-ascii characters and returns slug.
+    Results are memoized, transliteration is the most expensive part.
     :param raw_text: string you want to slugify
     :return: slug
     """
@@ -19,3 +24,17 @@ def slugify_article(article_id: int, article_title: str) -> str:
     :return: slug
     """
     return str(article_id) + '-' + slugify(article_title)
+
+
+async def cache_aget(cache, key: str, default=None):
+    """
+    Returns cached value in async code. Default `aget` of Django caches
+    runs `get` in a thread, in-process cache is read directly, it doesn't block.
+    :param cache: Django cache
+    :param key: key
+    :param default: value of missing keys
+    :return: value
+    """
+    if isinstance(cache, LocMemCache):
+        return cache.get(key, default)
+    return await cache.aget(key, default)
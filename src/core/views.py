@@ -1,3 +1,74 @@
-from django.shortcuts import render
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views import View
+from rest_framework.exceptions import APIException
+from rest_framework.renderers import JSONRenderer
 
-# Create your views here.
+from .mixins import make_etag
+
+
+class AsyncReadView(View):
+    """
+    Base of async read views served under ASGI.
+
+    DRF views are sync, so handlers query the database by the async ORM API
+    and render JSON themselves for anonymous requests of the default
+    representation. Other requests are passed to `sync_view` in a thread.
+    """
+    http_method_names = ['get', 'head', 'options']
+    renderer = JSONRenderer()
+    # DRF view function in `staticmethod` rendering what the async path doesn't handle
+    sync_view = None
+
+    etag = None
+    last_modified = None
+
+    # Query parameters handled by the async path
+    query_params = ()
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            return self.render({'detail': exc.detail}, status=exc.status_code)
+
+    def is_default_representation(self, request) -> bool:
+        """
+        Returns True for anonymous JSON requests without other query parameters
+        than `query_params`.
+        """
+        return (
+            set(request.GET).issubset(self.query_params)
+            and 'Authorization' not in request.headers
+            and request.headers.get('Accept', '*/*') in ('*/*', 'application/json')
+        )
+
+    async def run_sync_view(self, request, *args, **kwargs):
+        # Unrendered DRF response is rendered by the handler in a thread too
+        return await sync_to_async(self.sync_view)(request, *args, **kwargs)
+
+    def get_conditional_response(self, request, state, last_modified):
+        self.etag = make_etag(request, self.renderer.media_type, state)
+        if last_modified is not None:
+            self.last_modified = int(last_modified.timestamp())
+
+        response = get_conditional_response(
+            request, etag=self.etag, last_modified=self.last_modified
+        )
+        return self.finalize_response(response) if response is not None else None
+
+    def render(self, data, status=200, content=None) -> HttpResponse:
+        if content is None:
+            content = self.renderer.render(data)
+        response = HttpResponse(content, content_type=self.renderer.media_type, status=status)
+        return self.finalize_response(response)
+
+    def finalize_response(self, response):
+        if response.status_code in (200, 304):
+            if self.etag is not None:
+                response['ETag'] = self.etag
+            if self.last_modified is not None:
+                response['Last-Modified'] = http_date(self.last_modified)
+        return response
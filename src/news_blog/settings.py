@@ -40,7 +40,7 @@ INSTALLED_APPS = [
 
     'core',
     'authentication',
-    'articles',
+    'articles.apps.ArticlesConfig',
 
     'rest_framework',
     'rest_framework_simplejwt',
@@ -56,6 +56,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ALLOW_CREDENTIALS = True
@@ -85,17 +86,88 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'news_blog.wsgi.application'
+ASGI_APPLICATION = 'news_blog.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
+DATABASES = config.get('DATABASES', {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
-}
+})
+
+# Persistent connections, checked before reuse in a new request
+for database in DATABASES.values():
+    database.setdefault('CONN_MAX_AGE', config.get('CONN_MAX_AGE', 60))
+    database.setdefault('CONN_HEALTH_CHECKS', True)
+
+# Aliases of read-only replicas of the default database,
+# safe requests of views with `read_from_replica` read from them
+DATABASE_REPLICAS = config.get('DATABASE_REPLICAS', [])
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds reads of a client stay on the default database after its write,
+# it's marked in the default cache, which must be shared by workers
+REPLICA_STICKY_SECONDS = config.get('REPLICA_STICKY_SECONDS', 5)
+
+# Pragmas applied to every new SQLite connection (`core.receivers`),
+# an empty table keeps SQLite defaults
+SQLITE_PRAGMAS = config.get('SQLITE_PRAGMAS', {
+    # Readers don't block the writer and commits append to the log
+    'journal_mode': 'wal',
+    # WAL is still consistent after a crash, the last commits may be lost on power loss
+    'synchronous': 'normal',
+    'mmap_size': 64 * 1024 * 1024,
+    # Negative size is in KiB
+    'cache_size': -8000,
+    # Milliseconds a writer waits for the lock before `database is locked`
+    'busy_timeout': 5000,
+    'temp_store': 'memory',
+})
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+# LocMem is per process: several workers need a shared backend (Redis, Memcached, ...),
+# otherwise cached articles are invalidated in the writing worker only
+
+CACHES = config.get('CACHES', {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+})
+
+# Cache of rendered article detail responses
+ARTICLE_CACHE_ALIAS = config.get('ARTICLE_CACHE_ALIAS', 'default')
+
+ARTICLE_CACHE_TIMEOUT = config.get('ARTICLE_CACHE_TIMEOUT', 60 * 60)
+
+# Number of articles in the precomputed main page (stored in the same cache)
+MAIN_PAGE_FEED_SIZE = config.get('MAIN_PAGE_FEED_SIZE', 1000)
+
+# Seconds the precomputed main page is kept, workers without a shared cache
+# see writes of other workers after it expires
+MAIN_PAGE_FEED_TIMEOUT = config.get('MAIN_PAGE_FEED_TIMEOUT', 60)
+
+
+# Seconds between writes of buffered article views
+ARTICLE_VIEW_FLUSH_INTERVAL = config.get('ARTICLE_VIEW_FLUSH_INTERVAL', 10)
+
+# Render article list and detail from `.values()` rows instead of DRF serializers
+FAST_READ_SERIALIZATION = config.get('FAST_READ_SERIALIZATION', False)
+
+# Full-text search of articles.
+# `articles.search.SQLiteFTSBackend` works with SQLite databases only,
+# `articles.search.PythonIndexBackend` keeps index in `ARTICLE_SEARCH_INDEX_PATH` file.
+# By default the first one is used with SQLite and the second one otherwise.
+ARTICLE_SEARCH_BACKEND = config.get('ARTICLE_SEARCH_BACKEND', None)
+
+ARTICLE_SEARCH_INDEX_PATH = config.get(
+    'ARTICLE_SEARCH_INDEX_PATH', os.path.join(BASE_DIR, 'search_index')
+)
 
 
 # Auth settings
@@ -103,7 +175,7 @@ DATABASES = {
 AUTH_USER_MODEL = 'authentication.User'
 
 AUTHENTICATION_BACKENDS = (
-    'django.contrib.auth.backends.ModelBackend',
+    # Username or email, permissions of `ModelBackend`
     'authentication.backends.EmailOrUsernameModelBackend',
 )
 
@@ -114,18 +186,56 @@ AUTHENTICATION_BACKENDS = (
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': datetime.timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': datetime.timedelta(days=3),
+    'TOKEN_OBTAIN_SERIALIZER': 'authentication.jwt.VersionedTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.jwt.VersionedTokenRefreshSerializer',
 }
 
+# Per-process cache of users of JWT authenticated requests,
+# changes made in other processes are seen after TTL seconds
+JWT_USER_CACHE_SIZE = config.get('JWT_USER_CACHE_SIZE', 1024)
+JWT_USER_CACHE_TTL = config.get('JWT_USER_CACHE_TTL', 60)
+
 
 # REST Framework
 # If rest_framework in applications
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.jwt.CachedJWTAuthentication',
     ],
 }
 
+# Size of lists paginated by `core.pagination.KeysetPagination`,
+# views set it as their `pagination_class` explicitly
+PAGE_SIZE = config.get('PAGE_SIZE', 20)
+
+
+# Password hashing
+# https://docs.djangoproject.com/en/2.2/topics/auth/passwords/
+
+# Hashers of `authentication.hashers` with work factors of `PASSWORD_HASHER_OPTIONS`,
+# e.g. `[PASSWORD_HASHER_OPTIONS.pbkdf2]` with `iterations = 600000`
+POLICY_HASHERS = {
+    'pbkdf2': 'authentication.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'authentication.hashers.ScryptPasswordHasher',
+    # Requires argon2-cffi
+    'argon2': 'authentication.hashers.Argon2PasswordHasher',
+}
+PASSWORD_HASHER = config.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHER_OPTIONS = config.get('PASSWORD_HASHER_OPTIONS', {})
+
+if PASSWORD_HASHER not in POLICY_HASHERS:
+    raise TypeError("Unknown password hasher, expected one of: %s." % ', '.join(POLICY_HASHERS))
+
+# The first one hashes new passwords, others verify stored hashes,
+# which are rehashed by the first one on login
+PASSWORD_HASHERS = [POLICY_HASHERS[PASSWORD_HASHER]] + [
+    hasher for name, hasher in POLICY_HASHERS.items() if name != PASSWORD_HASHER
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -16,13 +16,23 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from articles.urls import async_urlpatterns as articles_async_urlpatterns
+from authentication.urls import async_urlpatterns as authentication_async_urlpatterns
+
 
 api_urlpatterns = [
     path('', include('authentication.urls', namespace='api-auth')),
     path('', include('articles.urls', namespace='articles')),
 ]
 
+# Async read views, they are worth it under ASGI (`news_blog.asgi`)
+async_api_urlpatterns = [
+    path('', include((authentication_async_urlpatterns, 'authentication'), namespace='api-auth-async')),
+    path('', include((articles_async_urlpatterns, 'article'), namespace='articles-async')),
+]
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/async/', include(async_api_urlpatterns)),
     path('api/', include(api_urlpatterns)),
 ]